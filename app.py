@@ -3,9 +3,10 @@ Smart Task Manager - Flask Backend Application
 A RESTful API for task management with JWT authentication
 """
 
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from extensions import db, jwt
 from datetime import datetime
+import hmac
 import os
 
 # Import configurations
@@ -13,28 +14,83 @@ from config import config
 
 # Extensions are initialized in extensions.py and bound here via init_app
 
-def create_app(config_name=None):
+def create_app(config_name=None, test_config=None):
     """Application factory pattern"""
     app = Flask(__name__)
     
-    # Load configuration
+    # Load configuration; test_config overrides individual settings
     config_name = config_name or os.environ.get('FLASK_ENV', 'default')
     app.config.from_object(config[config_name])
+    if test_config:
+        app.config.update(test_config)
+    
+    # Take the client address from X-Forwarded-For behind a load balancer
+    if app.config['TRUSTED_PROXY_COUNT']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        proxies = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+    
+    # Render raw task values (datetimes, enums) the same way Task.to_dict() does
+    from utils.serialization import TaskJSONProvider
+    app.json = TaskJSONProvider(app)
     
     # Initialize extensions with app
     db.init_app(app)
     jwt.init_app(app)
     
+    # Route task queries to the user's shard
+    from utils.sharding import ShardRouter
+    ShardRouter(app)
+    
+    # Request timing and readiness probes; registered first so every
+    # before_request stage is included in the measured latency
+    from utils.health import HealthMonitor
+    HealthMonitor(app)
+    
+    # Per-route rate limiting
+    if app.config['RATE_LIMIT_ENABLED']:
+        from utils.rate_limit import RateLimiter
+        RateLimiter(app)
+    
+    # Negotiated response compression
+    if app.config['COMPRESS_ENABLED']:
+        from utils.compression import Compressor
+        Compressor(app)
+    
+    # Group commit for task writes (see utils/group_commit.py)
+    if app.config['GROUP_COMMIT_ENABLED']:
+        from utils.group_commit import GroupCommitter
+        app.extensions['group_commit'] = GroupCommitter(
+            app,
+            max_batch=app.config['GROUP_COMMIT_MAX_BATCH'],
+            max_delay_ms=app.config['GROUP_COMMIT_MAX_DELAY_MS'],
+            timeout=app.config['GROUP_COMMIT_TIMEOUT']
+        )
+    
     # Import models to ensure they are registered with SQLAlchemy
     from models.user import User
     from models.task import Task
+    from models.task_archive import TaskArchive
+    from models.idempotency_key import IdempotencyKey
+    from models.user_shard import UserShard, IdSequence
     
     # Import and register blueprints
     from routes.auth import auth_bp
     from routes.tasks import tasks_bp
+    from routes.batch import batch_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(tasks_bp, url_prefix='/api')
+    app.register_blueprint(batch_bp, url_prefix='/api')
+    
+    # Admin-only sampling profiler; nothing is installed unless enabled
+    if app.config['PROFILER_ENABLED']:
+        from utils.profiler import SamplingProfiler
+        from routes.profiler import profiler_bp
+        SamplingProfiler(app)
+        app.register_blueprint(profiler_bp, url_prefix='/api')
+        app.extensions['health'].excluded_endpoints.update(
+            ('profiler.profile_duration', 'profiler.profile_requests'))
     
     # Error handlers
     @app.errorhandler(400)
@@ -66,10 +122,46 @@ def create_app(config_name=None):
             'version': '1.0.0'
         })
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
+    # Readiness for the load balancer: 503 once a probe threshold is breached
+    @app.route('/api/health/ready')
+    def health_ready():
+        report = app.extensions['health'].report(app)
+        return jsonify({
+            'status': report['status'],
+            'failing': report['failing'],
+            'checked_at': report['checked_at']
+        }), 200 if report['ready'] else 503
+    
+    # Full probe details (DB latency, pool usage, backends, p99)
+    @app.route('/api/health/deep')
+    def health_deep():
+        report = app.extensions['health'].report(app)
+        return jsonify(report), 200 if report['ready'] else 503
+    
+    # Runtime counters from the optional performance features; only exposed
+    # when METRICS_TOKEN is set, and only to callers presenting it
+    if app.config['METRICS_TOKEN']:
+        @app.route('/api/metrics')
+        def metrics():
+            scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), app.config['METRICS_TOKEN'].encode()):
+                return jsonify({'error': 'Unauthorized', 'message': 'Authentication required'}), 401
+            compressor = app.extensions.get('compressor')
+            committer = app.extensions.get('group_commit')
+            return jsonify({
+                'compression': compressor.snapshot() if compressor else None,
+                'group_commit': dict(committer.stats) if committer else None
+            })
+    
+    # Maintenance commands (init-db, archive-tasks, rebalance-user, ...)
+    from commands import register_commands, create_schema
+    register_commands(app)
+    
+    # Create database tables only when asked; production workers should not
+    # pay for a schema round trip on every start.
+    if app.config['AUTO_CREATE_TABLES']:
+        with app.app_context():
+            create_schema(app)
     
     return app
 
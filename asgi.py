@@ -0,0 +1,169 @@
+"""
+Smart Task Manager - ASGI entry point
+Serves the task API under an ASGI server (e.g. uvicorn)
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import io
+import os
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app import create_app
+from routes.tasks import READ_PLANS
+from utils.async_db import ASYNC_ENVIRON_KEY, AsyncEngines, run_read_async
+from utils.serialization import respond
+from utils.sharding import DEFAULT_SHARD
+
+class TaskAPI:
+    """
+    ASGI application serving task reads natively and the rest through WSGI
+
+    GET /api/tasks, /api/tasks/<id> and /api/tasks/stats run as coroutines
+    on the event loop: their read plans (routes/tasks.py) are executed on an
+    async driver, so a slow query only suspends its own request and one
+    process multiplexes as many reads as ASYNC_DB_POOL_SIZE connections
+    allow. The Flask request pipeline still runs around them (before_request
+    hooks such as rate limiting, JWT checks, error handlers, after_request
+    compression), so responses are identical to the WSGI views.
+
+    Every other route is handed to the Flask app on a pool of
+    ASGI_WORKER_THREADS threads.
+    """
+
+    def __init__(self, flask_app):
+        """
+        Initialize the ASGI application
+
+        Args:
+            flask_app (Flask): Application built by create_app
+        """
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WORKER_THREADS'])
+        self.engines = AsyncEngines(flask_app)
+        # Native reads bypass app.wsgi_app, so apply the same proxy rules to
+        # their environ (ProxyFix hands the rewritten environ to this lambda)
+        proxies = flask_app.config['TRUSTED_PROXY_COUNT']
+        self.proxy_fix = ProxyFix(lambda environ, start_response: environ,
+                                  x_for=proxies, x_proto=proxies) if proxies else None
+        # A shared rate limit backend (Redis) does blocking I/O in before_request
+        limiter = flask_app.extensions.get('rate_limiter')
+        self.blocking_hooks = limiter is not None and limiter.backend.name != 'memory'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            environ = build_environ(scope, io.BytesIO(b''))
+            try:
+                endpoint, view_args = self.flask_app.url_map.bind_to_environ(environ).match(method='GET')
+            except HTTPException:
+                endpoint = None
+            if endpoint in READ_PLANS:
+                if self.proxy_fix is not None:
+                    environ = self.proxy_fix(environ, None)
+                await self._serve_read(environ, send, endpoint, view_args)
+                return
+
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engines.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _serve_read(self, environ, send, endpoint, view_args):
+        """Run one read endpoint through the Flask request pipeline"""
+        app = self.flask_app
+        environ[ASYNC_ENVIRON_KEY] = True
+        with app.request_context(environ):
+            try:
+                if self.blocking_hooks:
+                    # to_thread copies the context, so the request is visible there
+                    rv = await asyncio.to_thread(app.preprocess_request)
+                else:
+                    rv = app.preprocess_request()
+                if rv is None:
+                    verify_jwt_in_request()
+                    rv = await self._run_plan(endpoint, view_args)
+            except Exception as e:
+                rv = self._handle_exception(e)
+            response = app.finalize_request(rv)
+            try:
+                await self._send_response(response, send, environ['REQUEST_METHOD'] == 'HEAD')
+            finally:
+                response.close()
+
+    async def _run_plan(self, endpoint, view_args):
+        plan, failure = READ_PLANS[endpoint]
+        user_id = get_jwt_identity()
+        router = self.flask_app.extensions['shard_router']
+        try:
+            if router.sharded:
+                # A directory miss queries the primary database synchronously
+                shard = await asyncio.to_thread(router.shard_for, user_id)
+            else:
+                shard = DEFAULT_SHARD
+            async with self.engines.session(shard) as session:
+                payload, status = await run_read_async(plan(user_id, **view_args), session)
+        except Exception as e:
+            payload, status = {'error': failure, 'details': str(e)}, 500
+        return respond(payload, status)
+
+    def _handle_exception(self, e):
+        """Turn an exception into a response the way Flask's dispatcher does"""
+        try:
+            return self.flask_app.handle_user_exception(e)
+        except Exception as unhandled:
+            return self.flask_app.handle_exception(unhandled)
+
+    async def _send_response(self, response, send, head):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                        for name, value in response.headers.items()]
+        })
+        if not head:
+            for chunk in response.iter_encoded():
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+def create_asgi_app(config_name=None):
+    """
+    Build the ASGI application around the Flask app factory
+
+    Args:
+        config_name (str): Configuration name passed to create_app; defaults
+            to FLASK_ENV, or 'production' when that is unset
+
+    Returns:
+        TaskAPI: ASGI callable
+    """
+    flask_app = create_app(config_name or os.environ.get('FLASK_ENV') or 'production')
+
+    workers = flask_app.config['ASGI_WORKER_THREADS']
+    pool_capacity = flask_app.config['DB_POOL_SIZE'] + flask_app.config['DB_MAX_OVERFLOW']
+    if pool_capacity < workers:
+        flask_app.logger.warning(
+            'ASGI_WORKER_THREADS (%d) exceeds the database pool capacity (%d); '
+            'requests will queue waiting for connections', workers, pool_capacity
+        )
+
+    return TaskAPI(flask_app)
+
+app = create_asgi_app()
@@ -0,0 +1,48 @@
+"""
+Cold start benchmark
+Measures interpreter start + import + create_app() in fresh processes
+
+Example:
+    python benchmarks/cold_start.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+built = time.perf_counter()
+print(f'{imported - started:.6f} {built - imported:.6f}')
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure application cold start time')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--create-tables', action='store_true',
+                        help='include db.create_all() (needs a reachable database)')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, AUTO_CREATE_TABLES='true' if args.create_tables else 'false')
+
+    imports, factories = [], []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=root, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        import_time, factory_time = map(float, output.split()[-2:])
+        imports.append(import_time)
+        factories.append(factory_time)
+
+    print(f'import app:   median {statistics.median(imports) * 1000:.1f} ms')
+    print(f'create_app(): median {statistics.median(factories) * 1000:.1f} ms')
+    print(f'total:        median {statistics.median(i + f for i, f in zip(imports, factories)) * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+HTTP load generator for the Smart Task Manager API
+Compares throughput and tail latency of one or more running servers
+
+Start the servers with RATE_LIMIT_ENABLED=false, or the per-user budgets
+will turn most of the load into 429 responses.
+
+Example (gunicorn sync and gthread workers vs. the ASGI entry point, whose
+task reads run on the async driver; same process count for all three):
+    FLASK_ENV=production WEB_CONCURRENCY=2 GUNICORN_WORKER_CLASS=sync \\
+        GUNICORN_BIND=:5000 gunicorn -c gunicorn.conf.py wsgi:app
+    FLASK_ENV=production WEB_CONCURRENCY=2 GUNICORN_THREADS=8 \\
+        GUNICORN_BIND=:5001 gunicorn -c gunicorn.conf.py wsgi:app
+    FLASK_ENV=production uvicorn asgi:app --workers 2 --port 5002 --log-level warning
+    python benchmarks/http_bench.py --target sync=http://localhost:5000 \\
+        --target gthread=http://localhost:5001 --target asgi=http://localhost:5002 \\
+        --concurrency 200 --requests 20000
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+def percentile(samples, pct):
+    """
+    Return the pct-th percentile of a list of samples
+
+    Args:
+        samples (list): Latency samples in seconds
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value, or 0.0 for an empty list
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def request_json(conn, method, path, body=None, token=None):
+    """Send one request on a kept-alive connection and return (status, body)"""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    payload = json.dumps(body) if body is not None else None
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+def obtain_token(base_url, seed_tasks=0):
+    """Register a throwaway user against base_url, create seed_tasks tasks and return its JWT"""
+    parsed = urlparse(base_url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    suffix = uuid.uuid4().hex[:10]
+    status, body = request_json(conn, 'POST', '/api/register', {
+        'username': f'bench_{suffix}',
+        'email': f'bench_{suffix}@example.com',
+        'password': 'benchmark123'
+    })
+    if status != 201:
+        raise SystemExit(f'Registration against {base_url} failed: {status} {body[:200]!r}')
+    token = json.loads(body)['access_token']
+    for i in range(seed_tasks):
+        request_json(conn, 'POST', '/api/tasks', {'title': f'seed task {i}', 'priority': 'High'}, token)
+    conn.close()
+    return token
+
+def run_target(name, base_url, mode, concurrency, total_requests, seed_tasks=0):
+    """
+    Drive total_requests requests at base_url from concurrency client threads
+
+    Returns:
+        dict: Summary with throughput, error count and latency percentiles
+    """
+    parsed = urlparse(base_url)
+    token = obtain_token(base_url, seed_tasks if mode == 'read' else 0)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [total_requests]
+
+    def next_slot():
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker():
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        local = []
+        failed = 0
+        while next_slot():
+            started = time.perf_counter()
+            try:
+                if mode == 'write':
+                    status, _ = request_json(conn, 'POST', '/api/tasks', {'title': 'bench task'}, token)
+                else:
+                    status, _ = request_json(conn, 'GET', '/api/tasks', token=token)
+                if status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'name': name,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Smart Task Manager servers')
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=base_url, may be given several times')
+    parser.add_argument('--mode', choices=['read', 'write'], default='read',
+                        help='read: GET /api/tasks, write: POST /api/tasks')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--seed-tasks', type=int, default=20,
+                        help='tasks created for the benchmark user before a read run')
+    args = parser.parse_args()
+
+    results = []
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        if not base_url:
+            name, base_url = target, target
+        print(f'Running {args.requests} {args.mode} requests against {name} '
+              f'({base_url}) with {args.concurrency} clients...')
+        results.append(run_target(name, base_url.rstrip('/'), args.mode,
+                                  args.concurrency, args.requests, args.seed_tasks))
+
+    print()
+    print(f"{'target':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for result in results:
+        print(f"{result['name']:<12}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['errors']:>8}")
+
+if __name__ == '__main__':
+    main()
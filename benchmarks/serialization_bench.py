@@ -0,0 +1,73 @@
+"""
+JSON vs MessagePack benchmark for task list payloads
+Reports payload size and encode/decode time per payload
+
+Example:
+    python benchmarks/serialization_bench.py --tasks 500 --rounds 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def build_tasks(count):
+    """Create transient Task objects with realistic field values"""
+    from models.task import Task, Priority, Status
+    now = datetime.utcnow()
+    tasks = []
+    for i in range(count):
+        task = Task(
+            title=f'Task number {i}',
+            user_id=1,
+            description='Follow up with the team about the quarterly report' if i % 2 else None,
+            due_date=now + timedelta(days=i % 30) if i % 3 else None,
+            priority=list(Priority)[i % 3],
+            status=list(Status)[i % 2]
+        )
+        task.id = i + 1
+        task.created_at = now - timedelta(minutes=i)
+        task.updated_at = now
+        tasks.append(task)
+    return tasks
+
+def timed(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - started) / rounds, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON and msgpack task payloads')
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    from flask import Flask
+    from utils.serialization import TaskJSONProvider, pack, unpack
+
+    app = Flask(__name__)
+    provider = TaskJSONProvider(app)
+    tasks = build_tasks(args.tasks)
+
+    def encode_json():
+        return provider.dumps({'tasks': [t.to_dict(raw=True) for t in tasks], 'count': len(tasks)}).encode('utf-8')
+
+    def encode_msgpack():
+        return pack({'tasks': [t.to_dict(raw=True) for t in tasks], 'count': len(tasks)})
+
+    json_encode, json_body = timed(encode_json, args.rounds)
+    msgpack_encode, msgpack_body = timed(encode_msgpack, args.rounds)
+    json_decode, _ = timed(lambda: provider.loads(json_body), args.rounds)
+    msgpack_decode, _ = timed(lambda: unpack(msgpack_body), args.rounds)
+
+    print(f'{args.tasks} tasks per payload, {args.rounds} rounds')
+    print(f"{'format':<10}{'bytes':>10}{'encode ms':>12}{'decode ms':>12}")
+    print(f"{'json':<10}{len(json_body):>10}{json_encode * 1000:>12.3f}{json_decode * 1000:>12.3f}")
+    print(f"{'msgpack':<10}{len(msgpack_body):>10}{msgpack_encode * 1000:>12.3f}{msgpack_decode * 1000:>12.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Flask CLI commands (run with `flask --app wsgi <command>`)
+"""
+
+import click
+from extensions import db
+
+def create_schema(app):
+    """Create tables on the primary database and on every task shard"""
+    # Shard binds carry no models of their own; the router creates their tables
+    db.create_all(bind_key=None)
+    app.extensions['shard_router'].create_tables()
+    app.logger.info('Database tables created successfully!')
+
+def register_commands(app):
+    """Attach the maintenance commands to the application"""
+    
+    # Schema management
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create all database tables"""
+        create_schema(app)
+    
+    @app.cli.command('migrate-enum-codes')
+    def migrate_enum_codes_command():
+        """Convert priority/status string columns to SMALLINT codes on every shard"""
+        from utils.migrations import migrate_enum_codes
+        router = app.extensions['shard_router']
+        for shard in router.shards:
+            converted = migrate_enum_codes(router.engine(shard))
+            app.logger.info('Shard %s: converted %s', shard, ', '.join(converted) or 'nothing')
+    
+    @app.cli.command('purge-idempotency-keys')
+    def purge_idempotency_keys_command():
+        """Delete expired Idempotency-Key records"""
+        from utils.idempotency import purge_expired_keys
+        deleted = purge_expired_keys()
+        app.logger.info('Deleted %d expired idempotency keys', deleted)
+    
+    @app.cli.command('archive-tasks')
+    @click.option('--older-than-days', type=int, default=None, help='Defaults to ARCHIVE_AFTER_DAYS')
+    @click.option('--batch-size', type=int, default=None, help='Defaults to ARCHIVE_BATCH_SIZE')
+    @click.option('--pause', type=float, default=None, help='Seconds between batches')
+    def archive_tasks_command(older_than_days, batch_size, pause):
+        """Move old completed tasks into tasks_archive on every shard"""
+        from utils.archival import archive_completed_tasks
+        router = app.extensions['shard_router']
+        for shard in router.shards:
+            with router.open_session(shard) as session:
+                archived = archive_completed_tasks(
+                    session,
+                    older_than_days if older_than_days is not None else app.config['ARCHIVE_AFTER_DAYS'],
+                    batch_size=batch_size or app.config['ARCHIVE_BATCH_SIZE'],
+                    pause_seconds=pause if pause is not None else app.config['ARCHIVE_PAUSE_SECONDS']
+                )
+            app.logger.info('Archived %d completed tasks on shard %s', archived, shard)
+    
+    # Sharding
+    @app.cli.command('pin-users')
+    @click.option('--shard', default='default', help='Shard for users without a directory entry')
+    def pin_users_command(shard):
+        """Pin users without a shard directory entry (run once when enabling sharding)"""
+        pinned = app.extensions['shard_router'].pin_unassigned_users(shard)
+        app.logger.info('Pinned %d users to shard %s', pinned, shard)
+    
+    @app.cli.command('rebalance-user')
+    @click.argument('user_id', type=int)
+    @click.argument('target')
+    @click.option('--batch-size', type=int, default=500, help='Rows copied per statement')
+    def rebalance_user_command(user_id, target, batch_size):
+        """Move one user's tasks to TARGET shard while the API keeps serving"""
+        from utils.sharding import move_user
+        copied = move_user(app.extensions['shard_router'], user_id, target, batch_size=batch_size)
+        app.logger.info('Moved user %d to shard %s (%d rows)', user_id, target, copied)
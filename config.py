@@ -1,4 +1,5 @@
 import os
+import warnings
 from datetime import timedelta
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
@@ -6,6 +7,45 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+def parse_task_shards(spec):
+    """
+    Parse TASK_SHARD_URIS, e.g. "default,shard1=mysql+pymysql://...,shard2=..."
+    
+    Returns:
+        tuple: (list of shard names, dict of SQLAlchemy binds for non-default shards)
+    """
+    names, binds = [], {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, uri = item.partition('=')
+        names.append(name.strip())
+        if uri:
+            binds[name.strip()] = uri.strip()
+    return names or ['default'], binds
+
+def parse_user_ids(spec, setting):
+    """
+    Parse a comma-separated list of user ids, e.g. PROFILER_ADMIN_IDS
+    
+    Entries that are not integers are skipped with a warning rather than
+    failing at import, since the setting may belong to a disabled feature.
+    
+    Returns:
+        frozenset: The valid user ids
+    """
+    ids = set()
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            ids.add(int(item))
+        except ValueError:
+            warnings.warn(f'{setting}: ignoring {item!r}, not a user id')
+    return frozenset(ids)
+
 class Config:
     """Base configuration class"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
@@ -28,21 +68,147 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool sizing. In ASGI mode every worker thread may hold a
+    # connection, so keep DB_POOL_SIZE + DB_MAX_OVERFLOW >= ASGI_WORKER_THREADS.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_pre_ping': True,
+        'pool_recycle': 3600
+    }
+    
+    # Run db.create_all() from create_app. Off by default; use
+    # `flask --app wsgi init-db` or AUTO_CREATE_TABLES=true to create the schema.
+    AUTO_CREATE_TABLES = (os.environ.get('AUTO_CREATE_TABLES') or 'false').lower() in ('1', 'true', 'yes')
+    
+    # Sharding of tasks by user_id (see utils/sharding.py). 'default' is the
+    # primary database; other shards are SQLAlchemy binds.
+    TASK_SHARDS, SQLALCHEMY_BINDS = parse_task_shards(os.environ.get('TASK_SHARD_URIS'))
+    SHARD_DIRECTORY_CACHE_SECONDS = float(os.environ.get('SHARD_DIRECTORY_CACHE_SECONDS') or 5)
+    SHARD_DIRECTORY_CACHE_SIZE = int(os.environ.get('SHARD_DIRECTORY_CACHE_SIZE') or 100000)
+    SHARD_MOVE_GRACE_SECONDS = float(os.environ.get('SHARD_MOVE_GRACE_SECONDS') or 5)
+    SHARD_ID_BLOCK_SIZE = int(os.environ.get('SHARD_ID_BLOCK_SIZE') or 1000)
+    
+    # ASGI serving (see asgi.py). Task reads run on the event loop with an
+    # async driver and ASYNC_DB_POOL_SIZE connections per process; all other
+    # routes run on ASGI_WORKER_THREADS threads.
+    ASGI_WORKER_THREADS = int(os.environ.get('ASGI_WORKER_THREADS') or 20)
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE') or 20)
+    
+    # Group commit: queue task writes from concurrent requests and commit them
+    # together after GROUP_COMMIT_MAX_DELAY_MS or GROUP_COMMIT_MAX_BATCH writes.
+    # Larger values trade per-request latency for fewer fsyncs.
+    GROUP_COMMIT_ENABLED = (os.environ.get('GROUP_COMMIT_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH') or 64)
+    GROUP_COMMIT_MAX_DELAY_MS = float(os.environ.get('GROUP_COMMIT_MAX_DELAY_MS') or 2)
+    GROUP_COMMIT_TIMEOUT = float(os.environ.get('GROUP_COMMIT_TIMEOUT') or 10)
+    
+    # How long a stored Idempotency-Key response can be replayed, and how long
+    # a key stays locked by a request that has not finished (keep it above the
+    # slowest write, e.g. GUNICORN_TIMEOUT)
+    IDEMPOTENCY_KEY_TTL = timedelta(hours=int(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS') or 24))
+    IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get('IDEMPOTENCY_LOCK_SECONDS') or 60)
+    
+    # Pagination for GET /api/tasks
+    TASKS_PER_PAGE = 50
+    TASKS_MAX_PER_PAGE = 200
+    
+    # Archival of completed tasks into tasks_archive (flask archive-tasks)
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 90)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 500)
+    ARCHIVE_PAUSE_SECONDS = float(os.environ.get('ARCHIVE_PAUSE_SECONDS') or 0.1)
+    
+    # Rate limiting (see utils/rate_limit.py). Budgets are "<count>/<period>"
+    # per endpoint; endpoints in RATE_LIMIT_BY_IP are keyed by client IP,
+    # everything else by JWT identity. Set RATE_LIMIT_STORAGE_URL to a
+    # redis:// URL to share budgets between worker processes.
+    RATE_LIMIT_ENABLED = (os.environ.get('RATE_LIMIT_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMITS = {
+        'auth.login': '10/minute',
+        'auth.register': '5/minute',
+        'tasks.create_task': '120/minute',
+        'tasks.update_task': '120/minute',
+        'tasks.delete_task': '120/minute',
+        'tasks.get_tasks': '300/minute',
+        'batch.run_batch': '60/minute'
+    }
+    RATE_LIMIT_BY_IP = ('auth.login', 'auth.register')
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL')
+    
+    # Number of reverse proxies / load balancers in front of the app. Their
+    # X-Forwarded-For and X-Forwarded-Proto headers are trusted, so the
+    # client IP (e.g. for per-IP rate limits) is the forwarded address. Leave
+    # at 0 when clients connect directly, or they could spoof their IP.
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT') or 0)
+    
+    # Response compression (see utils/compression.py). Algorithms are tried in
+    # this order when the client accepts several; br and zstd need the brotli
+    # and zstandard packages. COMPRESS_CACHE_SIZE compressed bodies are kept
+    # so identical payloads are not recompressed (0 disables the cache).
+    COMPRESS_ENABLED = (os.environ.get('COMPRESS_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_ALGORITHMS = ('zstd', 'br', 'gzip')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    COMPRESS_ZSTD_LEVEL = 3
+    COMPRESS_CACHE_SIZE = int(os.environ.get('COMPRESS_CACHE_SIZE') or 256)
+    
+    # Health probes for /api/health/ready and /api/health/deep (see
+    # utils/health.py). A worker is unready when a shard's SELECT 1 takes
+    # longer than HEALTH_MAX_DB_LATENCY_MS, its pool is at least
+    # HEALTH_MAX_POOL_SATURATION full, or the p99 of its last
+    # HEALTH_LATENCY_WINDOW requests exceeds HEALTH_MAX_P99_MS (judged once
+    # HEALTH_MIN_SAMPLES requests were seen). Results are reused for
+    # HEALTH_CACHE_SECONDS.
+    HEALTH_CACHE_SECONDS = float(os.environ.get('HEALTH_CACHE_SECONDS') or 2)
+    HEALTH_MAX_DB_LATENCY_MS = float(os.environ.get('HEALTH_MAX_DB_LATENCY_MS') or 250)
+    HEALTH_MAX_POOL_SATURATION = float(os.environ.get('HEALTH_MAX_POOL_SATURATION') or 0.9)
+    HEALTH_MAX_P99_MS = float(os.environ.get('HEALTH_MAX_P99_MS') or 2000)
+    HEALTH_LATENCY_WINDOW = int(os.environ.get('HEALTH_LATENCY_WINDOW') or 1000)
+    HEALTH_MIN_SAMPLES = int(os.environ.get('HEALTH_MIN_SAMPLES') or 50)
+    
+    # Sampling profiler (see utils/profiler.py). Off by default: when disabled
+    # no route, hook or SQL listener is installed. Only the user ids in
+    # PROFILER_ADMIN_IDS (comma-separated) may call /api/admin/profile.
+    PROFILER_ENABLED = (os.environ.get('PROFILER_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    PROFILER_ADMIN_IDS = parse_user_ids(os.environ.get('PROFILER_ADMIN_IDS'), 'PROFILER_ADMIN_IDS')
+    PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS') or 10)
+    PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS') or 30)
+    PROFILER_MAX_REQUESTS = int(os.environ.get('PROFILER_MAX_REQUESTS') or 100)
+    PROFILER_MAX_DEPTH = 128
+    
+    # Bearer token for GET /api/metrics; the route does not exist while unset
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Maximum number of sub-requests accepted by POST /api/batch
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS') or 50)
+    
     # JSON configuration
     JSON_SORT_KEYS = False
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    AUTO_CREATE_TABLES = (os.environ.get('AUTO_CREATE_TABLES') or 'true').lower() in ('1', 'true', 'yes')
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
 
+class TestingConfig(Config):
+    """Test configuration (see tests/conftest.py)"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///smart_task_manager_test.db'
+    AUTO_CREATE_TABLES = True
+    RATE_LIMIT_ENABLED = False
+
 # Configuration dictionary
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
 
@@ -1,8 +1,26 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 
-# Centralized extensions to avoid circular imports
-db = SQLAlchemy()
-jwt = JWTManager()
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager that verifies each token at most once per application context
 
+    Sub-requests dispatched by POST /api/batch share the batch's application
+    context, so the signature check done for the batch is reused by every
+    sub-request instead of being repeated.
+    """
+    
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if not has_app_context():
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        
+        verified = g.setdefault('_verified_jwts', {})
+        key = (encoded_token, csrf_value, allow_expired)
+        if key not in verified:
+            verified[key] = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        return verified[key]
 
+# Centralized extensions to avoid circular imports
+db = SQLAlchemy()
+jwt = CachingJWTManager()
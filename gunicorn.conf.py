@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for production serving
+
+Run with:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+or, for the ASGI entry point:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+
+Rolling restart without dropping in-flight requests:
+    kill -USR2 <master pid>     # start a new master running the new code
+    kill -WINCH <old pid>       # old workers finish their requests, then exit
+    kill -QUIT <old pid>        # retire the old master
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:5000'
+
+# Size the worker pool to the machine unless told otherwise
+workers = int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS') or 'gthread'
+
+# Import the application once in the master and fork workers from it, so each
+# worker starts without re-importing Flask, SQLAlchemy and the blueprints.
+preload_app = True
+
+# Workers get this long to finish in-flight requests on shutdown/restart
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 60)
+keepalive = 5
+
+# Recycle workers periodically; jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 10000)
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL') or 'info'
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master process"""
+    from extensions import db
+
+    app = server.app.wsgi()
+    # asgi:app wraps the Flask application
+    flask_app = getattr(app, 'flask_app', app)
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the parent's sockets alone; the child simply
+            # forgets them and opens its own connections on first use
+            engine.dispose(close=False)
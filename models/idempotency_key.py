@@ -0,0 +1,41 @@
+"""
+Idempotency key model for safely retried write requests
+"""
+
+from datetime import datetime
+from extensions import db
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a write request sent with an Idempotency-Key header"""
+    
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key_hash', name='uq_idempotency_user_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    # SHA-256 of the client supplied key and of the request it was first used with
+    key_hash = db.Column(db.String(64), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # NULL while the original request is still in progress
+    status_code = db.Column(db.SmallInteger, nullable=True)
+    response_body = db.Column(db.LargeBinary(length=2 ** 24), nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # End of the in-progress lease, then of the stored response's TTL
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __init__(self, user_id, key_hash, request_hash, expires_at):
+        """Initialize a new in-progress idempotency record"""
+        self.user_id = user_id
+        self.key_hash = key_hash
+        self.request_hash = request_hash
+        self.expires_at = expires_at
+    
+    def is_expired(self):
+        """Check if the record has outlived its lease or TTL"""
+        return datetime.utcnow() >= self.expires_at
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.user_id}:{self.key_hash[:8]}>'
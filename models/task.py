@@ -17,6 +17,77 @@ class Status(Enum):
     PENDING = "Pending"
     COMPLETED = "Completed"
 
+# Compact integer codes used for storage (see CodedEnum) and by binary
+# encodings such as msgpack. Never renumber an existing member.
+PRIORITY_CODES = {Priority.LOW: 0, Priority.MEDIUM: 1, Priority.HIGH: 2}
+STATUS_CODES = {Status.PENDING: 0, Status.COMPLETED: 1}
+PRIORITY_BY_CODE = {code: priority for priority, code in PRIORITY_CODES.items()}
+STATUS_BY_CODE = {code: status for status, code in STATUS_CODES.items()}
+
+def _name_table(enum_class):
+    """Map members and their common spellings to members, built once at import"""
+    table = {}
+    for member in enum_class:
+        for key in (member, member.value, member.value.lower(), member.value.upper(), member.name):
+            table[key] = member
+    return table
+
+PRIORITY_BY_NAME = _name_table(Priority)
+STATUS_BY_NAME = _name_table(Status)
+
+def _lookup(table, value):
+    if not isinstance(value, (str, Enum)):
+        return None
+    member = table.get(value)
+    if member is None and isinstance(value, str):
+        # Unusual casing or padding: normalize only on a miss
+        member = table.get(value.strip().lower())
+    return member
+
+def parse_priority(value):
+    """Return the Priority for a name in any case (or a Priority), else None"""
+    return _lookup(PRIORITY_BY_NAME, value)
+
+def parse_status(value):
+    """Return the Status for a name in any case (or a Status), else None"""
+    return _lookup(STATUS_BY_NAME, value)
+
+class CodedEnum(db.TypeDecorator):
+    """Enum column stored as its SMALLINT code instead of a string"""
+    
+    impl = db.SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class, codes):
+        super().__init__()
+        self.enum_class = enum_class
+        self._to_code = dict(codes)
+        self._from_code = {code: member for member, code in codes.items()}
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self._to_code[value]
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else self._from_code[value]
+
+DATETIME_FIELDS = ('due_date', 'created_at', 'updated_at')
+ENUM_FIELDS = ('priority', 'status')
+
+def finish_task_dict(data, raw=False):
+    """
+    Prepare a task dictionary for JSON unless raw is requested
+    
+    Raw dictionaries keep datetime and enum objects so that binary encoders
+    can write them as native timestamps and compact codes.
+    """
+    if raw:
+        return data
+    for field in DATETIME_FIELDS:
+        data[field] = data[field].isoformat() if data[field] else None
+    for field in ENUM_FIELDS:
+        data[field] = data[field].value if data[field] else None
+    return data
+
 class Task(db.Model):
     """Task model for task management"""
     
@@ -26,9 +97,10 @@ class Task(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     due_date = db.Column(db.DateTime, nullable=True)
-    priority = db.Column(db.Enum(Priority), default=Priority.MEDIUM, nullable=False)
-    status = db.Column(db.Enum(Status), default=Status.PENDING, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    priority = db.Column(CodedEnum(Priority, PRIORITY_CODES), default=Priority.MEDIUM, nullable=False)
+    status = db.Column(CodedEnum(Status, STATUS_CODES), default=Status.PENDING, nullable=False)
+    # No foreign key: tasks may live on a different shard than users
+    user_id = db.Column(db.Integer, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -41,19 +113,23 @@ class Task(db.Model):
         self.priority = priority
         self.status = status
     
-    def to_dict(self):
-        """Convert task object to dictionary for JSON serialization"""
-        return {
+    def to_dict(self, raw=False):
+        """
+        Convert task object to dictionary for serialization
+        
+        With raw=True datetimes and enums are left as objects (see finish_task_dict)
+        """
+        return finish_task_dict({
             'id': self.id,
             'title': self.title,
             'description': self.description,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'priority': self.priority.value if self.priority else None,
-            'status': self.status.value if self.status else None,
+            'due_date': self.due_date,
+            'priority': self.priority,
+            'status': self.status,
             'user_id': self.user_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }, raw)
     
     def is_overdue(self):
         """Check if the task is overdue"""
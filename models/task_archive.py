@@ -0,0 +1,44 @@
+"""
+Archive table for completed tasks moved out of the hot tasks table
+"""
+
+from datetime import datetime
+from extensions import db
+from models.task import Priority, Status, PRIORITY_CODES, STATUS_CODES, CodedEnum, finish_task_dict
+
+class TaskArchive(db.Model):
+    """Completed task moved out of `tasks` by the archival job"""
+    
+    __tablename__ = 'tasks_archive'
+    __table_args__ = (
+        db.Index('ix_tasks_archive_user_created', 'user_id', 'created_at'),
+    )
+    
+    # Ids are copied from `tasks`, never generated here
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    due_date = db.Column(db.DateTime, nullable=True)
+    priority = db.Column(CodedEnum(Priority, PRIORITY_CODES), nullable=False)
+    status = db.Column(CodedEnum(Status, STATUS_CODES), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self, raw=False):
+        """Convert archived task to the same dictionary shape as Task.to_dict()"""
+        return finish_task_dict({
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'due_date': self.due_date,
+            'priority': self.priority,
+            'status': self.status,
+            'user_id': self.user_id,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }, raw)
+    
+    def __repr__(self):
+        return f'<TaskArchive {self.title}>'
@@ -17,8 +17,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
-    # Relationship with tasks
-    tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Tasks are not a relationship: they live on the user's shard, see
+    # utils.sharding.ShardRouter.session_for()
     
     def __init__(self, username, email, password):
         """Initialize a new user"""
@@ -0,0 +1,45 @@
+"""
+Shard directory and task id sequence models (primary database)
+"""
+
+from datetime import datetime
+from extensions import db
+
+class UserShard(db.Model):
+    """Directory entry pinning a user's tasks to one shard"""
+
+    __tablename__ = 'user_shards'
+
+    ACTIVE = 'active'
+    MOVING = 'moving'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shard = db.Column(db.String(64), nullable=False)
+    # 'moving' blocks writes while the rebalance tool copies the user's tasks
+    state = db.Column(db.String(16), default=ACTIVE, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __init__(self, user_id, shard, state=ACTIVE):
+        """Initialize a new directory entry"""
+        self.user_id = user_id
+        self.shard = shard
+        self.state = state
+
+    def __repr__(self):
+        return f'<UserShard {self.user_id}->{self.shard} ({self.state})>'
+
+class IdSequence(db.Model):
+    """Named sequence handing out blocks of globally unique ids"""
+
+    __tablename__ = 'id_sequences'
+
+    name = db.Column(db.String(64), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+
+    def __init__(self, name, next_value):
+        """Initialize a new sequence"""
+        self.name = name
+        self.next_value = next_value
+
+    def __repr__(self):
+        return f'<IdSequence {self.name}={self.next_value}>'
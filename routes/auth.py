@@ -8,6 +8,7 @@ from datetime import datetime
 import re
 from models.user import User
 from extensions import db
+from utils.transactions import commit_session
 from utils.helpers import validate_email, validate_password
 
 auth_bp = Blueprint('auth', __name__)
@@ -60,7 +61,7 @@ def register():
         # Create new user
         user = User(username=username, email=email, password=password)
         db.session.add(user)
-        db.session.commit()
+        commit_session()
         
         # Generate JWT token
         access_token = create_access_token(identity=user.id)
@@ -0,0 +1,163 @@
+"""
+Batch route for multiplexing several API calls in one round trip
+"""
+
+from flask import Blueprint, request, jsonify, current_app, g
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+from utils.transactions import commit_request_sessions, rollback_request_sessions
+
+batch_bp = Blueprint('batch', __name__)
+
+# Blueprints whose endpoints may be called from inside a batch
+BATCHABLE_BLUEPRINTS = ('auth', 'tasks')
+
+# Sub-request headers forwarded to the dispatched request
+FORWARDED_HEADERS = ('Idempotency-Key',)
+
+def _dispatch(method, path, body, query_string, headers):
+    """
+    Run one sub-request through the full Flask dispatch pipeline in-process
+
+    The sub-request inherits the batch's client address (as rewritten by
+    ProxyFix), so per-IP rate limits apply to the real caller.
+
+    Returns:
+        tuple: (status_code, response body as JSON or text)
+    """
+    builder = EnvironBuilder(
+        path=path,
+        method=method,
+        json=body,
+        query_string=query_string,
+        headers=headers,
+        environ_base={'REMOTE_ADDR': request.environ.get('REMOTE_ADDR')}
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with current_app.request_context(environ):
+        try:
+            response = current_app.full_dispatch_request()
+        except Exception as e:
+            current_app.logger.exception('Batch sub-request %s %s failed', method, path)
+            return 500, {'error': 'Internal server error', 'details': str(e)}
+
+    if response.is_json:
+        return response.status_code, response.get_json()
+    return response.status_code, response.get_data(as_text=True)
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """
+    Execute several API calls in one request
+
+    The JWT is verified once for the whole batch and every sub-request is
+    dispatched in-process with the same identity.
+
+    Expected JSON payload:
+    {
+        "atomic": "boolean (optional, defaults to false)",
+        "requests": [
+            {
+                "method": "GET|POST|PUT|DELETE",
+                "path": "/api/tasks/1",
+                "body": "object (optional)",
+                "query": "object (optional)",
+                "headers": "object (optional, only Idempotency-Key is forwarded)"
+            }
+        ]
+    }
+
+    With "atomic": true all sub-requests run in one database transaction;
+    the first failing sub-request rolls everything back and the remaining
+    ones are skipped.
+    """
+    data = request.get_json(silent=True)
+
+    if not data:
+        return jsonify({'error': 'No JSON data provided'}), 400
+    if not isinstance(data, dict):
+        return jsonify({'error': 'The batch must be a JSON object'}), 400
+
+    sub_requests = data.get('requests')
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+
+    max_requests = current_app.config['BATCH_MAX_REQUESTS']
+    if len(sub_requests) > max_requests:
+        return jsonify({'error': f'A batch may contain at most {max_requests} requests'}), 400
+
+    atomic = bool(data.get('atomic', False))
+    adapter = current_app.url_map.bind('')
+    authorization = request.headers.get('Authorization')
+
+    # Validate every sub-request before running any of them
+    for index, sub in enumerate(sub_requests):
+        if not isinstance(sub, dict) or not sub.get('path'):
+            return jsonify({'error': f'requests[{index}].path is required'}), 400
+        if not isinstance(sub['path'], str):
+            return jsonify({'error': f'requests[{index}].path must be a string'}), 400
+        for field in ('headers', 'query'):
+            if sub.get(field) is not None and not isinstance(sub[field], dict):
+                return jsonify({'error': f'requests[{index}].{field} must be an object'}), 400
+
+        method = str(sub.get('method', 'GET')).upper()
+        try:
+            endpoint, _ = adapter.match(sub['path'].split('?', 1)[0], method=method)
+        except HTTPException:
+            return jsonify({'error': f'requests[{index}]: no route for {method} {sub["path"]}'}), 400
+
+        if endpoint.split('.', 1)[0] not in BATCHABLE_BLUEPRINTS:
+            return jsonify({'error': f'requests[{index}]: {sub["path"]} cannot be batched'}), 400
+
+    responses = []
+    failed = False
+    g.defer_commit = atomic
+    try:
+        for sub in sub_requests:
+            if failed:
+                responses.append({'status': 424, 'body': {'error': 'Skipped after earlier failure in atomic batch'}})
+                continue
+
+            headers = {name: value for name, value in (sub.get('headers') or {}).items()
+                       if name in FORWARDED_HEADERS}
+            # Sub-responses are embedded in the JSON batch body
+            headers['Accept'] = 'application/json'
+            if authorization:
+                headers['Authorization'] = authorization
+
+            path, _, query_string = sub['path'].partition('?')
+            status, body = _dispatch(
+                str(sub.get('method', 'GET')).upper(),
+                path,
+                sub.get('body'),
+                sub.get('query') or query_string or None,
+                headers
+            )
+            responses.append({'status': status, 'body': body})
+
+            if atomic and status >= 400:
+                failed = True
+
+        if atomic:
+            if failed:
+                rollback_request_sessions()
+            else:
+                commit_request_sessions()
+    except Exception as e:
+        rollback_request_sessions()
+        return jsonify({'error': 'Batch failed', 'details': str(e)}), 500
+    finally:
+        g.defer_commit = False
+
+    return jsonify({
+        'atomic': atomic,
+        'committed': not (atomic and failed),
+        'responses': responses,
+        'count': len(responses)
+    }), 200
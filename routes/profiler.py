@@ -0,0 +1,85 @@
+"""
+Admin-only profiling routes (registered only when PROFILER_ENABLED is set)
+
+Each call profiles the worker process that receives it; with several
+gunicorn workers, repeat the call or profile a single-worker instance.
+"""
+
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app, make_response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.profiler import ProfilerBusyError
+
+profiler_bp = Blueprint('profiler', __name__)
+
+def admin_required(view):
+    """Allow only user ids listed in PROFILER_ADMIN_IDS (checked after @jwt_required)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Ids, unlike usernames, cannot be claimed through open registration
+        if int(get_jwt_identity()) not in current_app.config['PROFILER_ADMIN_IDS']:
+            return jsonify({'error': 'Forbidden', 'message': 'Access denied'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def _profile_response(session):
+    """Collapsed stacks as text/plain, or the full summary with ?format=json"""
+    summary = session.summary()
+    if request.args.get('format') == 'json':
+        return jsonify(summary), 200
+    response = make_response(summary['stacks'])
+    response.mimetype = 'text/plain'
+    response.headers['X-Profile-Samples'] = str(summary['samples'])
+    response.headers['X-Profile-SQL-Seconds'] = str(summary['sql_seconds'])
+    return response, 200
+
+@profiler_bp.route('/admin/profile', methods=['POST'])
+@jwt_required()
+@admin_required
+def profile_duration():
+    """
+    Sample all request threads of this worker for a number of seconds
+    
+    Query parameters:
+    - seconds: Duration (default 10, at most PROFILER_MAX_SECONDS)
+    - format: "json" for the SQL summary as well as the stacks
+    """
+    seconds = request.args.get('seconds', 10, type=float)
+    if not 0 < seconds <= current_app.config['PROFILER_MAX_SECONDS']:
+        return jsonify({'error': f"seconds must be between 0 and {current_app.config['PROFILER_MAX_SECONDS']}"}), 400
+    
+    try:
+        session = current_app.extensions['profiler'].profile_for(seconds)
+    except ProfilerBusyError as e:
+        return jsonify({'error': 'Conflict', 'message': str(e)}), 409
+    return _profile_response(session)
+
+@profiler_bp.route('/admin/profile/requests', methods=['POST'])
+@jwt_required()
+@admin_required
+def profile_requests():
+    """
+    Profile the next requests to one endpoint served by this worker
+    
+    Query parameters:
+    - endpoint: Flask endpoint name, e.g. tasks.get_tasks (required)
+    - count: Requests to profile (default 10, at most PROFILER_MAX_REQUESTS)
+    - timeout: Seconds to wait for them (default and maximum PROFILER_MAX_SECONDS)
+    - format: "json" for the SQL summary as well as the stacks
+    """
+    endpoint = request.args.get('endpoint')
+    if endpoint not in current_app.view_functions or endpoint.startswith('profiler.'):
+        return jsonify({'error': 'endpoint must name an API endpoint, e.g. tasks.get_tasks'}), 400
+    
+    count = request.args.get('count', 10, type=int)
+    if not 0 < count <= current_app.config['PROFILER_MAX_REQUESTS']:
+        return jsonify({'error': f"count must be between 1 and {current_app.config['PROFILER_MAX_REQUESTS']}"}), 400
+    
+    max_seconds = current_app.config['PROFILER_MAX_SECONDS']
+    timeout = min(request.args.get('timeout', max_seconds, type=float), max_seconds)
+    
+    try:
+        session = current_app.extensions['profiler'].profile_requests(endpoint, count, timeout)
+    except ProfilerBusyError as e:
+        return jsonify({'error': 'Conflict', 'message': str(e)}), 409
+    return _profile_response(session)
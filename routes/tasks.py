@@ -2,22 +2,56 @@
 Task management routes for CRUD operations
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from datetime import datetime
-from models.task import Task, Priority, Status
+from sqlalchemy import func, literal, select, union_all
+from models.task import Task, Priority, Status, parse_priority, parse_status
+from models.task_archive import TaskArchive
 from models.user import User
-from extensions import db
+from utils.transactions import run_write, rollback_request_sessions
+from utils.archival import restore_archived_task
+from utils.async_db import run_read
+from utils.sharding import ShardMovingError
+from utils.idempotency import idempotent
 from utils.helpers import parse_datetime
+from utils.serialization import MalformedBodyError, get_request_data, respond
 
 tasks_bp = Blueprint('tasks', __name__)
 
+def _shards():
+    """Return the application's ShardRouter"""
+    return current_app.extensions['shard_router']
+
+@tasks_bp.before_request
+def reject_writes_during_move():
+    """Answer 503 to writes for a user whose tasks are being moved between shards"""
+    router = _shards()
+    if not router.sharded or request.method not in ('POST', 'PUT', 'DELETE'):
+        return None
+    
+    verify_jwt_in_request(optional=True)
+    user_id = get_jwt_identity()
+    if user_id is None:
+        return None
+    
+    try:
+        router.ensure_writable(user_id)
+    except ShardMovingError as e:
+        response, status = respond({'error': 'Service unavailable', 'message': str(e)}, 503)
+        response.headers['Retry-After'] = str(int(e.retry_after + 0.999))
+        return response, status
+    return None
+
 @tasks_bp.route('/tasks', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_task():
     """
     Create a new task
     
+    Send an Idempotency-Key header to make retries safe.
+    
     Expected JSON payload:
     {
         "title": "string",
@@ -28,14 +62,14 @@ def create_task():
     """
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
+        data = get_request_data()
         
         if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
+            return respond({'error': 'No JSON data provided'}, 400)
         
         # Validate required fields
         if 'title' not in data or not data['title'].strip():
-            return jsonify({'error': 'Title is required'}), 400
+            return respond({'error': 'Title is required'}, 400)
         
         title = data['title'].strip()
         description = data.get('description', '').strip() if data.get('description') else None
@@ -46,35 +80,232 @@ def create_task():
         if 'due_date' in data and data['due_date']:
             due_date = parse_datetime(data['due_date'])
             if not due_date:
-                return jsonify({'error': 'Invalid due_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}), 400
+                return respond({'error': 'Invalid due_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}, 400)
         
         # Parse priority if provided
         if 'priority' in data and data['priority']:
-            try:
-                priority = Priority(data['priority'].title())
-            except ValueError:
-                return jsonify({'error': 'Invalid priority. Must be Low, Medium, or High'}), 400
-        
-        # Create new task
-        task = Task(
-            title=title,
-            description=description,
-            due_date=due_date,
-            priority=priority,
-            user_id=user_id
-        )
-        
-        db.session.add(task)
-        db.session.commit()
-        
-        return jsonify({
+            priority = parse_priority(data['priority'])
+            if priority is None:
+                return respond({'error': 'Invalid priority. Must be Low, Medium, or High'}, 400)
+        
+        # Create new task; ids come from the shard router and are never reused
+        new_id = _shards().new_task_id()
+        
+        def write(session):
+            task = Task(
+                title=title,
+                description=description,
+                due_date=due_date,
+                priority=priority,
+                user_id=user_id
+            )
+            task.id = new_id
+            session.add(task)
+            session.flush()
+            return task.to_dict(raw=True)
+        
+        task_data = run_write(write, user_id)
+        
+        return respond({
             'message': 'Task created successfully',
-            'task': task.to_dict()
-        }), 201
+            'task': task_data
+        }, 201)
         
+    except MalformedBodyError as e:
+        return respond({'error': str(e)}, 400)
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': 'Failed to create task', 'details': str(e)}), 500
+        rollback_request_sessions()
+        return respond({'error': 'Failed to create task', 'details': str(e)}, 500)
+
+def _task_filters(model, status_enum=None, priority_enum=None, overdue=False):
+    """Build the list filter conditions for Task or TaskArchive"""
+    conditions = []
+    if status_enum:
+        conditions.append(model.status == status_enum)
+    if priority_enum:
+        conditions.append(model.priority == priority_enum)
+    if overdue:
+        conditions.append(model.due_date < datetime.utcnow())
+        conditions.append(model.status == Status.PENDING)
+    return conditions
+
+def _merged_task_page(user_id, conditions_for, page, per_page):
+    """
+    Page through live and archived tasks ordered by created_at desc
+    
+    Only ids are unioned and paginated; the rows for the page are then loaded
+    from each table by primary key. Part of list_tasks_plan (use yield from).
+    
+    Returns:
+        tuple: (list of task dictionaries, total number of matching tasks)
+    """
+    hot = select(Task.id, Task.created_at, literal(False).label('archived')).where(
+        Task.user_id == user_id, *conditions_for(Task))
+    cold = select(TaskArchive.id, TaskArchive.created_at, literal(True).label('archived')).where(
+        TaskArchive.user_id == user_id, *conditions_for(TaskArchive))
+    merged = union_all(hot, cold).subquery()
+    
+    total = (yield select(func.count()).select_from(merged)).scalar()
+    rows = (yield (
+        select(merged)
+        .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    )).all()
+    
+    hot_ids = [row.id for row in rows if not row.archived]
+    cold_ids = [row.id for row in rows if row.archived]
+    hot_tasks, cold_tasks = {}, {}
+    if hot_ids:
+        hot_tasks = {t.id: t for t in (yield select(Task).where(Task.id.in_(hot_ids))).scalars()}
+    if cold_ids:
+        cold_tasks = {t.id: t for t in (yield select(TaskArchive).where(TaskArchive.id.in_(cold_ids))).scalars()}
+    
+    tasks = []
+    for row in rows:
+        source = cold_tasks if row.archived else hot_tasks
+        if row.id in source:
+            tasks.append(dict(source[row.id].to_dict(raw=True), archived=bool(row.archived)))
+    return tasks, total
+
+# Read plans
+#
+# The read endpoints are written once as generators that yield SQLAlchemy
+# statements and receive their results. The Flask views below drive them with
+# a request session (utils.async_db.run_read); asgi.py drives the same plans
+# on an async driver (run_read_async). Each plan returns (payload, status).
+
+def list_tasks_plan(user_id):
+    """Read plan for GET /tasks (query parameters are taken from the request)"""
+    # Parse filters
+    status_enum = None
+    status_filter = request.args.get('status')
+    if status_filter:
+        status_enum = parse_status(status_filter)
+        if status_enum is None:
+            return {'error': 'Invalid status filter'}, 400
+    
+    priority_enum = None
+    priority_filter = request.args.get('priority')
+    if priority_filter:
+        priority_enum = parse_priority(priority_filter)
+        if priority_enum is None:
+            return {'error': 'Invalid priority filter'}, 400
+    
+    overdue_filter = request.args.get('overdue')
+    overdue = bool(overdue_filter and overdue_filter.lower() == 'true')
+    
+    def conditions_for(model):
+        return _task_filters(model, status_enum, priority_enum, overdue)
+    
+    include_archived = (request.args.get('include_archived') or '').lower() == 'true'
+    paginate = include_archived or 'page' in request.args or 'per_page' in request.args
+    owned = (Task.user_id == user_id, *conditions_for(Task))
+    
+    if not paginate:
+        # Execute query and sort by created_at desc
+        tasks = (yield select(Task).where(*owned).order_by(Task.created_at.desc())).scalars().all()
+        
+        return {
+            'tasks': [task.to_dict(raw=True) for task in tasks],
+            'count': len(tasks)
+        }, 200
+    
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', current_app.config['TASKS_PER_PAGE'], type=int)
+    if page < 1 or per_page < 1 or per_page > current_app.config['TASKS_MAX_PER_PAGE']:
+        return {'error': f"page must be >= 1 and per_page between 1 and {current_app.config['TASKS_MAX_PER_PAGE']}"}, 400
+    
+    if include_archived:
+        task_dicts, total = yield from _merged_task_page(user_id, conditions_for, page, per_page)
+    else:
+        total = (yield select(func.count(Task.id)).where(*owned)).scalar()
+        tasks = (yield (
+            select(Task).where(*owned)
+            .order_by(Task.created_at.desc(), Task.id.desc())
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        )).scalars().all()
+        task_dicts = [task.to_dict(raw=True) for task in tasks]
+    
+    return {
+        'tasks': task_dicts,
+        'count': len(task_dicts),
+        'total': total,
+        'page': page,
+        'per_page': per_page
+    }, 200
+
+def get_task_plan(user_id, task_id):
+    """Read plan for GET /tasks/<id>; archived tasks are marked with `archived`"""
+    task = (yield select(Task).where(Task.id == task_id, Task.user_id == user_id)).scalars().first()
+    
+    if not task:
+        archived = (yield select(TaskArchive).where(
+            TaskArchive.id == task_id, TaskArchive.user_id == user_id)).scalars().first()
+        if not archived:
+            return {'error': 'Task not found'}, 404
+        return {
+            'task': dict(archived.to_dict(raw=True), archived=True)
+        }, 200
+    
+    return {
+        'task': task.to_dict(raw=True)
+    }, 200
+
+def task_stats_plan(user_id):
+    """Read plan for GET /tasks/stats"""
+    # Get all tasks for the user
+    all_tasks = (yield select(Task).where(Task.user_id == user_id)).scalars().all()
+    
+    # Archived tasks are all completed; only their priorities are needed
+    archived_by_priority = dict((yield (
+        select(TaskArchive.priority, func.count(TaskArchive.id))
+        .where(TaskArchive.user_id == user_id)
+        .group_by(TaskArchive.priority)
+    )).all())
+    archived_tasks = sum(archived_by_priority.values())
+    
+    # Calculate statistics
+    total_tasks = len(all_tasks) + archived_tasks
+    completed_tasks = len([t for t in all_tasks if t.status == Status.COMPLETED]) + archived_tasks
+    pending_tasks = len([t for t in all_tasks if t.status == Status.PENDING])
+    overdue_tasks = len([t for t in all_tasks if t.is_overdue()])
+    
+    # Priority breakdown
+    priority_stats = {
+        'low': len([t for t in all_tasks if t.priority == Priority.LOW]) + archived_by_priority.get(Priority.LOW, 0),
+        'medium': len([t for t in all_tasks if t.priority == Priority.MEDIUM]) + archived_by_priority.get(Priority.MEDIUM, 0),
+        'high': len([t for t in all_tasks if t.priority == Priority.HIGH]) + archived_by_priority.get(Priority.HIGH, 0)
+    }
+    
+    return {
+        'total_tasks': total_tasks,
+        'completed_tasks': completed_tasks,
+        'pending_tasks': pending_tasks,
+        'overdue_tasks': overdue_tasks,
+        'archived_tasks': archived_tasks,
+        'completion_rate': round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0,
+        'priority_breakdown': priority_stats
+    }, 200
+
+# Endpoint -> (plan, message for unexpected errors); asgi.py serves these
+# endpoints natively and hands everything else to the Flask views
+READ_PLANS = {
+    'tasks.get_tasks': (list_tasks_plan, 'Failed to get tasks'),
+    'tasks.get_task': (get_task_plan, 'Failed to get task'),
+    'tasks.get_task_stats': (task_stats_plan, 'Failed to get task statistics')
+}
+
+def _serve_read(endpoint, **view_args):
+    """Run a read plan on the user's shard session and render the result"""
+    plan, failure = READ_PLANS[endpoint]
+    try:
+        user_id = get_jwt_identity()
+        payload, status = run_read(plan(user_id, **view_args), _shards().session_for(user_id))
+        return respond(payload, status)
+    except Exception as e:
+        return respond({'error': failure, 'details': str(e)}, 500)
 
 @tasks_bp.route('/tasks', methods=['GET'])
 @jwt_required()
@@ -86,44 +317,10 @@ def get_tasks():
     - status: Filter by status (Pending, Completed)
     - priority: Filter by priority (Low, Medium, High)
     - overdue: Filter overdue tasks (true/false)
+    - include_archived: Also return archived tasks (true/false)
+    - page, per_page: Paginate results (always applied with include_archived)
     """
-    try:
-        user_id = get_jwt_identity()
-        
-        # Build query
-        query = Task.query.filter_by(user_id=user_id)
-        
-        # Apply filters
-        status_filter = request.args.get('status')
-        if status_filter:
-            try:
-                status_enum = Status(status_filter.title())
-                query = query.filter_by(status=status_enum)
-            except ValueError:
-                return jsonify({'error': 'Invalid status filter'}), 400
-        
-        priority_filter = request.args.get('priority')
-        if priority_filter:
-            try:
-                priority_enum = Priority(priority_filter.title())
-                query = query.filter_by(priority=priority_enum)
-            except ValueError:
-                return jsonify({'error': 'Invalid priority filter'}), 400
-        
-        overdue_filter = request.args.get('overdue')
-        if overdue_filter and overdue_filter.lower() == 'true':
-            query = query.filter(Task.due_date < datetime.utcnow(), Task.status == Status.PENDING)
-        
-        # Execute query and sort by created_at desc
-        tasks = query.order_by(Task.created_at.desc()).all()
-        
-        return jsonify({
-            'tasks': [task.to_dict() for task in tasks],
-            'count': len(tasks)
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': 'Failed to get tasks', 'details': str(e)}), 500
+    return _serve_read('tasks.get_tasks')
 
 @tasks_bp.route('/tasks/<int:task_id>', methods=['GET'])
 @jwt_required()
@@ -131,26 +328,17 @@ def get_task(task_id):
     """
     Get a specific task by ID
     """
-    try:
-        user_id = get_jwt_identity()
-        task = Task.query.filter_by(id=task_id, user_id=user_id).first()
-        
-        if not task:
-            return jsonify({'error': 'Task not found'}), 404
-        
-        return jsonify({
-            'task': task.to_dict()
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': 'Failed to get task', 'details': str(e)}), 500
+    return _serve_read('tasks.get_task', task_id=task_id)
 
 @tasks_bp.route('/tasks/<int:task_id>', methods=['PUT'])
 @jwt_required()
+@idempotent
 def update_task(task_id):
     """
     Update a specific task
     
+    Updating an archived task moves it back into the live tasks table.
+    
     Expected JSON payload (all fields optional):
     {
         "title": "string",
@@ -162,80 +350,96 @@ def update_task(task_id):
     """
     try:
         user_id = get_jwt_identity()
-        task = Task.query.filter_by(id=task_id, user_id=user_id).first()
-        
-        if not task:
-            return jsonify({'error': 'Task not found'}), 404
-        
-        data = request.get_json()
+        data = get_request_data()
         if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
+            return respond({'error': 'No JSON data provided'}, 400)
         
-        # Update fields if provided
+        # Validate everything up front so the write itself cannot fail on input
+        changes = {}
         if 'title' in data and data['title']:
-            task.title = data['title'].strip()
+            changes['title'] = data['title'].strip()
         
         if 'description' in data:
-            task.description = data['description'].strip() if data['description'] else None
+            changes['description'] = data['description'].strip() if data['description'] else None
         
         if 'due_date' in data:
             if data['due_date']:
                 due_date = parse_datetime(data['due_date'])
                 if not due_date:
-                    return jsonify({'error': 'Invalid due_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}), 400
-                task.due_date = due_date
+                    return respond({'error': 'Invalid due_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}, 400)
+                changes['due_date'] = due_date
             else:
-                task.due_date = None
+                changes['due_date'] = None
         
         if 'priority' in data and data['priority']:
-            try:
-                task.priority = Priority(data['priority'].title())
-            except ValueError:
-                return jsonify({'error': 'Invalid priority. Must be Low, Medium, or High'}), 400
+            changes['priority'] = parse_priority(data['priority'])
+            if changes['priority'] is None:
+                return respond({'error': 'Invalid priority. Must be Low, Medium, or High'}, 400)
         
         if 'status' in data and data['status']:
-            try:
-                task.status = Status(data['status'].title())
-            except ValueError:
-                return jsonify({'error': 'Invalid status. Must be Pending or Completed'}), 400
-        
-        # Update timestamp
-        task.updated_at = datetime.utcnow()
-        
-        db.session.commit()
-        
-        return jsonify({
+            changes['status'] = parse_status(data['status'])
+            if changes['status'] is None:
+                return respond({'error': 'Invalid status. Must be Pending or Completed'}, 400)
+        
+        def write(session):
+            task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
+            if not task:
+                task = restore_archived_task(session, task_id, user_id)
+            if not task:
+                return None
+            
+            for field, value in changes.items():
+                setattr(task, field, value)
+            
+            # Update timestamp
+            task.updated_at = datetime.utcnow()
+            session.flush()
+            return task.to_dict(raw=True)
+        
+        task_data = run_write(write, user_id)
+        
+        if task_data is None:
+            return respond({'error': 'Task not found'}, 404)
+        
+        return respond({
             'message': 'Task updated successfully',
-            'task': task.to_dict()
-        }), 200
+            'task': task_data
+        }, 200)
         
+    except MalformedBodyError as e:
+        return respond({'error': str(e)}, 400)
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': 'Failed to update task', 'details': str(e)}), 500
+        rollback_request_sessions()
+        return respond({'error': 'Failed to update task', 'details': str(e)}, 500)
 
 @tasks_bp.route('/tasks/<int:task_id>', methods=['DELETE'])
 @jwt_required()
+@idempotent
 def delete_task(task_id):
     """
-    Delete a specific task
+    Delete a specific task (live or archived)
     """
     try:
         user_id = get_jwt_identity()
-        task = Task.query.filter_by(id=task_id, user_id=user_id).first()
         
-        if not task:
-            return jsonify({'error': 'Task not found'}), 404
+        def write(session):
+            task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
+            if not task:
+                return session.query(TaskArchive).filter_by(id=task_id, user_id=user_id).delete() > 0
+            session.delete(task)
+            session.flush()
+            return True
         
-        db.session.delete(task)
-        db.session.commit()
+        if not run_write(write, user_id):
+            return respond({'error': 'Task not found'}, 404)
         
-        return jsonify({
+        return respond({
             'message': 'Task deleted successfully'
-        }), 200
+        }, 200)
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': 'Failed to delete task', 'details': str(e)}), 500
+        rollback_request_sessions()
+        return respond({'error': 'Failed to delete task', 'details': str(e)}, 500)
 
 @tasks_bp.route('/tasks/stats', methods=['GET'])
 @jwt_required()
@@ -243,35 +447,4 @@ def get_task_stats():
     """
     Get task statistics for the current user
     """
-    try:
-        user_id = get_jwt_identity()
-        
-        # Get all tasks for the user
-        all_tasks = Task.query.filter_by(user_id=user_id).all()
-        
-        # Calculate statistics
-        total_tasks = len(all_tasks)
-        completed_tasks = len([t for t in all_tasks if t.status == Status.COMPLETED])
-        pending_tasks = len([t for t in all_tasks if t.status == Status.PENDING])
-        overdue_tasks = len([t for t in all_tasks if t.is_overdue()])
-        
-        # Priority breakdown
-        priority_stats = {
-            'low': len([t for t in all_tasks if t.priority == Priority.LOW]),
-            'medium': len([t for t in all_tasks if t.priority == Priority.MEDIUM]),
-            'high': len([t for t in all_tasks if t.priority == Priority.HIGH])
-        }
-        
-        return jsonify({
-            'total_tasks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'pending_tasks': pending_tasks,
-            'overdue_tasks': overdue_tasks,
-            'completion_rate': round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0,
-            'priority_breakdown': priority_stats
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': 'Failed to get task statistics', 'details': str(e)}), 500
-
-
+    return _serve_read('tasks.get_task_stats')
@@ -29,9 +29,15 @@ if [ ! -f ".env" ]; then
 fi
 
 # Start the Flask application
-echo "Starting Flask application..."
 echo "API will be available at: http://localhost:5000"
 echo
+if [ "$1" = "production" ]; then
+    echo "Starting gunicorn (production)..."
+    export FLASK_ENV=production
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+fi
+
+echo "Starting Flask application..."
 python app.py
 
 
@@ -0,0 +1,46 @@
+"""
+Shared fixtures: applications built on throwaway SQLite files
+"""
+
+import pytest
+
+from app import create_app
+from extensions import db
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Return a factory building a TestingConfig app with settings overridden"""
+    apps = []
+
+    def factory(**overrides):
+        settings = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}'}
+        settings.update(overrides)
+        app = create_app('testing', settings)
+        apps.append(app)
+        return app
+
+    yield factory
+
+    for app in apps:
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def register(client, username='alice'):
+    """Register a user and return (user id, Authorization headers)"""
+    response = client.post('/api/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'secret123'
+    })
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    return body['user']['id'], {'Authorization': f'Bearer {body["access_token"]}'}
@@ -0,0 +1,132 @@
+"""
+Tests for archived tasks behind /api/tasks/<id>
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import register
+from models.task import Task
+from models.task_archive import TaskArchive
+from utils.archival import archive_completed_tasks
+
+@pytest.fixture
+def archived_task(app, client):
+    """Create a completed task, age it and archive it; return (id, headers)"""
+    _, headers = register(client)
+    task_id = client.post('/api/tasks', json={'title': 'old', 'priority': 'High'},
+                          headers=headers).get_json()['task']['id']
+    client.put(f'/api/tasks/{task_id}', json={'status': 'Completed'}, headers=headers)
+
+    with app.app_context():
+        session = app.extensions['shard_router'].session('default')
+        session.query(Task).update({'updated_at': datetime.utcnow() - timedelta(days=100)})
+        session.commit()
+        assert archive_completed_tasks(session, older_than_days=90, pause_seconds=0) == 1
+    return task_id, headers
+
+def counts(app):
+    with app.app_context():
+        session = app.extensions['shard_router'].session('default')
+        return session.query(Task).count(), session.query(TaskArchive).count()
+
+def test_get_returns_archived_task(client, archived_task):
+    task_id, headers = archived_task
+    response = client.get(f'/api/tasks/{task_id}', headers=headers)
+
+    assert response.status_code == 200
+    task = response.get_json()['task']
+    assert task['id'] == task_id
+    assert task['archived'] is True
+    assert task['status'] == 'Completed'
+
+def test_delete_removes_archived_task(app, client, archived_task):
+    task_id, headers = archived_task
+
+    assert client.delete(f'/api/tasks/{task_id}', headers=headers).status_code == 200
+    assert counts(app) == (0, 0)
+    assert client.get(f'/api/tasks/{task_id}', headers=headers).status_code == 404
+
+def test_update_restores_archived_task(app, client, archived_task):
+    task_id, headers = archived_task
+    response = client.put(f'/api/tasks/{task_id}', json={'status': 'Pending'}, headers=headers)
+
+    assert response.status_code == 200
+    task = response.get_json()['task']
+    assert (task['id'], task['status'], task['priority'], task['title']) == (task_id, 'Pending', 'High', 'old')
+    assert counts(app) == (1, 0)
+    assert 'archived' not in client.get(f'/api/tasks/{task_id}', headers=headers).get_json()['task']
+
+def test_archived_task_of_another_user_is_not_found(client, archived_task):
+    task_id, _ = archived_task
+    _, other = register(client, 'mallory')
+
+    assert client.get(f'/api/tasks/{task_id}', headers=other).status_code == 404
+    assert client.put(f'/api/tasks/{task_id}', json={'status': 'Pending'}, headers=other).status_code == 404
+    assert client.delete(f'/api/tasks/{task_id}', headers=other).status_code == 404
+
+def test_archived_ids_are_never_reused(app, client, archived_task):
+    task_id, headers = archived_task
+    new_id = client.post('/api/tasks', json={'title': 'new'}, headers=headers).get_json()['task']['id']
+
+    assert new_id != task_id
+    assert client.get(f'/api/tasks/{task_id}', headers=headers).get_json()['task']['title'] == 'old'
+    assert client.put(f'/api/tasks/{task_id}', json={'status': 'Pending'}, headers=headers).status_code == 200
+    assert counts(app) == (2, 0)
+
+@pytest.fixture
+def mixed_tasks(app, client):
+    """Five tasks created a day apart; t1 and t3 archived. Return headers."""
+    _, headers = register(client)
+    ids = {}
+    for i in range(5):
+        response = client.post('/api/tasks', json={'title': f't{i}', 'priority': ('Low', 'High')[i % 2]},
+                               headers=headers)
+        ids[f't{i}'] = response.get_json()['task']['id']
+    for title in ('t1', 't3'):
+        client.put(f'/api/tasks/{ids[title]}', json={'status': 'Completed'}, headers=headers)
+
+    now = datetime.utcnow()
+    with app.app_context():
+        session = app.extensions['shard_router'].session('default')
+        for i in range(5):
+            task = session.get(Task, ids[f't{i}'])
+            task.created_at = now - timedelta(days=10 - i)
+            if task.title in ('t1', 't3'):
+                task.updated_at = now - timedelta(days=100)
+        session.commit()
+        assert archive_completed_tasks(session, older_than_days=90, pause_seconds=0) == 2
+    return headers
+
+def test_include_archived_pages_through_both_tables_newest_first(client, mixed_tasks):
+    pages = [client.get(f'/api/tasks?include_archived=true&page={page}&per_page=2',
+                        headers=mixed_tasks).get_json() for page in (1, 2, 3)]
+
+    assert [page['total'] for page in pages] == [5, 5, 5]
+    assert [[(task['title'], task['archived']) for task in page['tasks']] for page in pages] == [
+        [('t4', False), ('t3', True)],
+        [('t2', False), ('t1', True)],
+        [('t0', False)]
+    ]
+
+def test_include_archived_applies_filters_to_both_tables(client, mixed_tasks):
+    body = client.get('/api/tasks?include_archived=true&priority=High', headers=mixed_tasks).get_json()
+
+    assert [task['title'] for task in body['tasks']] == ['t3', 't1']
+    assert body['total'] == 2
+
+def test_listing_without_include_archived_skips_archived_tasks(client, mixed_tasks):
+    body = client.get('/api/tasks', headers=mixed_tasks).get_json()
+
+    assert sorted(task['title'] for task in body['tasks']) == ['t0', 't2', 't4']
+
+def test_stats_count_archived_tasks(client, mixed_tasks):
+    stats = client.get('/api/tasks/stats', headers=mixed_tasks).get_json()
+
+    assert stats['total_tasks'] == 5
+    assert stats['archived_tasks'] == 2
+    assert stats['completed_tasks'] == 2
+    assert stats['pending_tasks'] == 3
+    assert stats['completion_rate'] == 40.0
+    assert stats['priority_breakdown'] == {'low': 3, 'medium': 0, 'high': 2}
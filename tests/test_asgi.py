@@ -0,0 +1,110 @@
+"""
+Tests for asgi.TaskAPI: task reads served natively on the async driver
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import routes.tasks
+from asgi import TaskAPI
+from conftest import register
+
+PATHS = [
+    '/api/tasks',
+    '/api/tasks?priority=High',
+    '/api/tasks?page=2&per_page=1',
+    '/api/tasks?include_archived=true',
+    '/api/tasks?status=bogus',
+    '/api/tasks/stats',
+    '/api/tasks/{id}',
+    '/api/tasks/999999'
+]
+
+async def call(api, path, headers, method='GET'):
+    """Send one request through the ASGI callable; return (status, headers, body)"""
+    raw_path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': raw_path, 'raw_path': raw_path.encode(),
+        'query_string': query.encode(), 'root_path': '', 'server': ('testserver', 80),
+        'client': ('203.0.113.9', 1234),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await api(scope, receive, send)
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict((k.decode(), v.decode()) for k, v in start['headers']), body
+
+@pytest.fixture
+def seeded(client):
+    _, headers = register(client)
+    ids = [client.post('/api/tasks', json={'title': f't{i}', 'priority': ('Low', 'High')[i % 2]},
+                       headers=headers).get_json()['task']['id'] for i in range(3)]
+    return headers, ids[0]
+
+def test_native_reads_match_the_wsgi_views(app, client, seeded, monkeypatch):
+    headers, task_id = seeded
+    paths = [path.format(id=task_id) for path in PATHS]
+    expected = [(r.status_code, r.get_json()) for r in (client.get(path, headers=headers) for path in paths)]
+
+    # The native path must not fall back to the synchronous driver
+    def sync_read(*args, **kwargs):
+        raise AssertionError('served through the WSGI view')
+    monkeypatch.setattr(routes.tasks, 'run_read', sync_read)
+
+    api = TaskAPI(app)
+
+    async def scenario():
+        try:
+            results = [await call(api, path, headers) for path in paths]
+            unauthorized = await call(api, '/api/tasks', {})
+            concurrent = await asyncio.gather(*[call(api, f'/api/tasks/{task_id}', headers) for _ in range(20)])
+            return results, unauthorized, concurrent, api.engines.engine('default').url.drivername
+        finally:
+            await api.engines.dispose()
+
+    results, unauthorized, concurrent, driver = asyncio.run(scenario())
+
+    assert [(status, json.loads(body)) for status, _, body in results] == expected
+    assert {status for status, _, _ in results} >= {200, 400, 404}
+    assert all(h['content-type'] == 'application/json' for _, h, _ in results)
+    assert unauthorized[0] == 401
+    assert json.loads(unauthorized[2]) == client.get('/api/tasks').get_json()
+    assert {status for status, _, _ in concurrent} == {200}
+    assert driver == 'sqlite+aiosqlite'
+
+def test_head_returns_headers_only(app, seeded):
+    headers, _ = seeded
+    api = TaskAPI(app)
+
+    async def scenario():
+        try:
+            return await call(api, '/api/tasks', headers, method='HEAD')
+        finally:
+            await api.engines.dispose()
+
+    status, response_headers, body = asyncio.run(scenario())
+    assert status == 200 and body == b''
+    assert int(response_headers['content-length']) > 0
+
+def test_other_routes_go_through_wsgi(app, seeded):
+    headers, _ = seeded
+    api = TaskAPI(app)
+
+    async def scenario():
+        return await call(api, '/api/health', {})
+
+    status, _, body = asyncio.run(scenario())
+    assert status == 200
+    assert json.loads(body)['status'] == 'healthy'
+    assert api.engines._engines == {}
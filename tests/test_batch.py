@@ -0,0 +1,119 @@
+"""
+Tests for POST /api/batch
+"""
+
+import flask_jwt_extended
+import pytest
+
+from conftest import register
+
+def batch(client, headers, requests, atomic=False):
+    return client.post('/api/batch', json={'atomic': atomic, 'requests': requests}, headers=headers)
+
+def titles(client, headers):
+    return sorted(task['title'] for task in client.get('/api/tasks', headers=headers).get_json()['tasks'])
+
+def test_sub_requests_run_in_order(client):
+    _, headers = register(client)
+    response = batch(client, headers, [
+        {'method': 'POST', 'path': '/api/tasks', 'body': {'title': 'a'}},
+        {'method': 'GET', 'path': '/api/tasks?status=Pending'}
+    ])
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [item['status'] for item in body['responses']] == [201, 200]
+    assert body['responses'][1]['body']['count'] == 1
+
+def test_atomic_batch_rolls_back_and_skips_after_a_failure(client):
+    _, headers = register(client)
+    response = batch(client, headers, [
+        {'method': 'POST', 'path': '/api/tasks', 'body': {'title': 'kept?'}},
+        {'method': 'POST', 'path': '/api/tasks', 'body': {'priority': 'High'}},
+        {'method': 'POST', 'path': '/api/tasks', 'body': {'title': 'never run'}}
+    ], atomic=True)
+
+    body = response.get_json()
+    assert body['committed'] is False
+    assert [item['status'] for item in body['responses']] == [201, 400, 424]
+    assert titles(client, headers) == []
+
+def test_non_atomic_batch_keeps_earlier_writes(client):
+    _, headers = register(client)
+    response = batch(client, headers, [
+        {'method': 'POST', 'path': '/api/tasks', 'body': {'title': 'kept'}},
+        {'method': 'POST', 'path': '/api/tasks', 'body': {}}
+    ])
+
+    assert [item['status'] for item in response.get_json()['responses']] == [201, 400]
+    assert titles(client, headers) == ['kept']
+
+def test_rejects_routes_that_cannot_be_batched(client):
+    _, headers = register(client)
+
+    for method, path in (('POST', '/api/batch'), ('GET', '/api/health')):
+        response = batch(client, headers, [{'method': method, 'path': path}])
+        assert response.status_code == 400
+        assert 'cannot be batched' in response.get_json()['error']
+
+def test_rejects_batches_over_the_maximum(make_app):
+    client = make_app(BATCH_MAX_REQUESTS=2).test_client()
+    _, headers = register(client)
+
+    response = batch(client, headers, [{'method': 'GET', 'path': '/api/tasks'}] * 3)
+    assert response.status_code == 400
+    assert 'at most 2' in response.get_json()['error']
+
+@pytest.mark.parametrize('payload', [
+    [{'method': 'GET', 'path': '/api/tasks'}],
+    {'requests': []},
+    {'requests': 'x'},
+    {'requests': [5]},
+    {'requests': [{'path': 5}]},
+    {'requests': [{'method': 'GET', 'path': '/nowhere'}]},
+    {'requests': [{'method': 'GET', 'path': '/api/tasks', 'headers': 'x'}]},
+    {'requests': [{'method': 'GET', 'path': '/api/tasks', 'query': 5}]}
+])
+def test_malformed_batches_are_rejected_before_anything_runs(client, payload):
+    _, headers = register(client)
+    if isinstance(payload, dict) and payload['requests'] and isinstance(payload['requests'], list):
+        # A valid write ahead of the bad entry must not run either
+        payload = {'requests': [{'method': 'POST', 'path': '/api/tasks', 'body': {'title': 'early'}},
+                                *payload['requests']]}
+
+    response = client.post('/api/batch', json=payload, headers=headers)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert titles(client, headers) == []
+
+def test_token_is_decoded_once_per_batch(client, monkeypatch):
+    _, headers = register(client)
+    decoded = []
+    original = flask_jwt_extended.JWTManager._decode_jwt_from_config
+
+    def counting(self, *args, **kwargs):
+        decoded.append(1)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(flask_jwt_extended.JWTManager, '_decode_jwt_from_config', counting)
+    response = batch(client, headers, [{'method': 'GET', 'path': '/api/tasks'}] * 5)
+
+    assert [item['status'] for item in response.get_json()['responses']] == [200] * 5
+    assert len(decoded) == 1
+
+def test_per_ip_limits_use_the_callers_address(make_app):
+    app = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS={'auth.login': '1/minute'},
+                   RATE_LIMIT_BY_IP=('auth.login',))
+    client = app.test_client()
+    _, headers = register(client)
+    login = [{'method': 'POST', 'path': '/api/login', 'body': {'username': 'alice', 'password': 'secret123'}}]
+
+    def statuses(address):
+        response = client.post('/api/batch', json={'requests': login}, headers=headers,
+                               environ_base={'REMOTE_ADDR': address})
+        return response.get_json()['responses'][0]['status']
+
+    assert statuses('203.0.113.1') == 200
+    assert statuses('203.0.113.2') == 200
+    assert statuses('203.0.113.1') == 429
@@ -0,0 +1,94 @@
+"""
+Tests for utils/compression.py
+"""
+
+import gzip
+
+import pytest
+from flask import Response, jsonify, stream_with_context
+
+BODY = {'tasks': [{'id': i, 'title': f'task {i}', 'description': 'x' * 40} for i in range(100)]}
+
+@pytest.fixture
+def compress_app(make_app):
+    app = make_app(COMPRESS_ALGORITHMS=('br', 'gzip'), COMPRESS_MIN_SIZE=512)
+
+    @app.get('/_test/large')
+    def large():
+        return jsonify(BODY)
+
+    @app.get('/_test/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.get('/_test/stream')
+    def stream():
+        def chunks():
+            for i in range(50):
+                yield f'{i},{"y" * 40}\n'
+        return Response(stream_with_context(chunks()), mimetype='text/csv')
+
+    return app
+
+def stats(app):
+    return app.extensions['compressor'].snapshot()
+
+@pytest.mark.parametrize('accept, expected', [
+    ('gzip', 'gzip'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('gzip;q=0.5, br;q=1.0', 'br'),
+    # Equal q-values fall back to the server preference order
+    ('gzip, br', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+    ('identity', None),
+    ('', None)
+])
+def test_negotiates_encoding_by_q_value(compress_app, accept, expected):
+    if 'br' in accept:
+        brotli = pytest.importorskip('brotli')
+    client = compress_app.test_client()
+    response = client.get('/_test/large', headers={'Accept-Encoding': accept})
+
+    assert response.headers.get('Content-Encoding') == expected
+    assert 'Accept-Encoding' in response.headers['Vary']
+    decode = {None: bytes, 'gzip': gzip.decompress, 'br': lambda data: brotli.decompress(data)}[expected]
+    assert decode(response.get_data()) == client.get('/_test/large').get_data()
+
+def test_small_bodies_are_sent_uncompressed(compress_app):
+    response = compress_app.test_client().get('/_test/small', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    # Still varies: a larger body from the same URL would be compressed
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.get_json() == {'ok': True}
+    assert stats(compress_app)['responses_compressed'] == 0
+
+def test_identical_bodies_hit_the_variant_cache(compress_app):
+    client = compress_app.test_client()
+    bodies = [client.get('/_test/large', headers={'Accept-Encoding': 'gzip'}).get_data() for _ in range(3)]
+
+    snapshot = stats(compress_app)
+    assert len(set(bodies)) == 1
+    assert snapshot['responses_compressed'] == 3
+    assert snapshot['cache_hits'] == 2
+    assert snapshot['bytes_saved'] > 0
+
+def test_cache_is_keyed_by_encoding(compress_app):
+    pytest.importorskip('brotli')
+    client = compress_app.test_client()
+    client.get('/_test/large', headers={'Accept-Encoding': 'gzip'})
+    client.get('/_test/large', headers={'Accept-Encoding': 'br'})
+
+    assert stats(compress_app)['cache_hits'] == 0
+
+def test_streamed_responses_are_compressed_chunk_by_chunk(compress_app):
+    response = compress_app.test_client().get('/_test/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    expected = ''.join(f'{i},{"y" * 40}\n' for i in range(50)).encode()
+    assert gzip.decompress(response.get_data()) == expected
+    snapshot = stats(compress_app)
+    assert snapshot['responses_streamed'] == 1
+    assert snapshot['bytes_in'] == len(expected)
+    assert snapshot['bytes_out'] == len(response.get_data())
@@ -0,0 +1,68 @@
+"""
+Tests for utils/group_commit.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from models.task import Task
+
+def add_task(title, before=None):
+    """Return a unit of work inserting one task, optionally running before() first"""
+    def work(session):
+        if before is not None:
+            before()
+        task = Task(title=title, user_id=1)
+        session.add(task)
+        session.flush()
+        return task.id
+    return work
+
+def titles(app):
+    with app.app_context():
+        session = app.extensions['shard_router'].session('default')
+        return sorted(title for (title,) in session.query(Task.title))
+
+@pytest.fixture
+def committer(make_app):
+    app = make_app(GROUP_COMMIT_ENABLED=True, GROUP_COMMIT_MAX_DELAY_MS=1, GROUP_COMMIT_TIMEOUT=0.2)
+    return app.extensions['group_commit']
+
+def test_writes_from_concurrent_requests_commit(committer):
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(committer.submit(add_task(f't{i}'))))
+               for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 10
+    assert titles(committer.app) == sorted(f't{i}' for i in range(10))
+
+def test_timed_out_queued_write_is_cancelled_and_never_applied(committer):
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=committer.submit,
+                               args=(add_task('blocker', lambda: (started.set(), release.wait(5))),))
+    blocker.start()
+    assert started.wait(5)
+
+    # The flusher is busy with the blocker, so this write stays queued
+    with pytest.raises(TimeoutError):
+        committer.submit(add_task('late'))
+
+    release.set()
+    blocker.join()
+    committer.submit(add_task('after'))
+
+    assert titles(committer.app) == ['after', 'blocker']
+
+def test_timed_out_running_write_waits_for_its_outcome(committer):
+    # Picked up in time but slower than the timeout: the request must not
+    # fail while its write goes on to commit
+    task_id = committer.submit(add_task('slow', lambda: time.sleep(0.5)))
+
+    assert task_id is not None
+    assert titles(committer.app) == ['slow']
@@ -0,0 +1,89 @@
+"""
+Tests for the health probes
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+
+def ready(app):
+    response = app.test_client().get('/api/health/ready')
+    return response.status_code, response.get_json()['failing']
+
+def test_deep_probe_hides_error_details(make_app, tmp_path):
+    app = make_app(RATE_LIMIT_ENABLED=True, HEALTH_CACHE_SECONDS=0)
+    monitor = app.extensions['health']
+    broken = create_engine(f'sqlite:///{tmp_path}/missing/secret-host.db')
+    monitor._probe_engine = lambda shard, engine: broken
+
+    def ping():
+        raise ConnectionError('redis://:hunter2@cache.internal:6379 refused')
+    app.extensions['rate_limiter'].backend.ping = ping
+
+    response = app.test_client().get('/api/health/deep')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 503
+    assert 'secret-host' not in body and 'hunter2' not in body
+    checks = response.get_json()['checks']
+    assert checks['database']['default'] == {'ok': False, 'error': 'Database unreachable'}
+    assert checks['rate_limit_backend']['error'] == 'Backend unreachable'
+
+def test_slow_database_probe_makes_the_worker_unready(make_app):
+    app = make_app(HEALTH_CACHE_SECONDS=0, HEALTH_MAX_DB_LATENCY_MS=20)
+    assert ready(app) == (200, [])
+
+    monitor = app.extensions['health']
+    with app.app_context():
+        probe = monitor._probe_engine('default', app.extensions['shard_router'].engine('default'))
+    event.listen(probe, 'before_cursor_execute', lambda *args: time.sleep(0.05))
+
+    assert ready(app) == (503, ['database.default'])
+
+def test_saturated_pool_makes_the_worker_unready(make_app):
+    app = make_app(HEALTH_CACHE_SECONDS=0, HEALTH_MAX_POOL_SATURATION=0.9,
+                   SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 2, 'max_overflow': 0})
+    with app.app_context():
+        engine = app.extensions['shard_router'].engine('default')
+    held = [engine.connect()]
+    try:
+        # Half full is fine; the probe uses its own engine, so it does not queue
+        assert ready(app) == (200, [])
+        held.append(engine.connect())
+        assert ready(app) == (503, ['pool.default'])
+    finally:
+        for conn in held:
+            conn.close()
+
+    assert ready(app) == (200, [])
+
+def test_p99_is_judged_once_enough_samples_were_seen(make_app):
+    app = make_app(HEALTH_CACHE_SECONDS=0, HEALTH_MIN_SAMPLES=5, HEALTH_MAX_P99_MS=100)
+    monitor = app.extensions['health']
+    for _ in range(4):
+        monitor.latency.add(0.5)
+
+    # Too few samples to judge, and health checks are not counted
+    assert ready(app) == (200, [])
+    assert monitor.latency.snapshot()['samples'] == 4
+
+    monitor.latency.add(0.5)
+    assert ready(app) == (503, ['request_latency'])
+
+@pytest.mark.parametrize('endpoint', ['/api/health/ready', '/api/health/deep'])
+def test_probe_results_are_cached(make_app, endpoint):
+    app = make_app(HEALTH_CACHE_SECONDS=60, HEALTH_MIN_SAMPLES=1, HEALTH_MAX_P99_MS=100)
+    monitor = app.extensions['health']
+    client = app.test_client()
+    first = client.get(endpoint)
+    assert first.status_code == 200
+
+    monitor.latency.add(1.0)
+    cached = client.get(endpoint)
+    assert cached.status_code == 200
+    assert cached.get_json()['checked_at'] == first.get_json()['checked_at']
+
+    # Once the report is stale the breach shows up
+    monitor._cached = (time.monotonic() - 61, monitor._cached[1])
+    assert client.get(endpoint).status_code == 503
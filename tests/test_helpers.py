@@ -0,0 +1,24 @@
+"""
+Tests for utils/helpers.py
+"""
+
+import pytest
+
+from utils.helpers import validate_priority, validate_status
+
+@pytest.mark.parametrize('value', ['High', 'high', 'HIGH', ' High '])
+def test_validate_priority_accepts_what_parse_priority_accepts(value):
+    assert validate_priority(value)
+
+@pytest.mark.parametrize('value', ['Completed', 'pending', ' PENDING '])
+def test_validate_status_accepts_what_parse_status_accepts(value):
+    assert validate_status(value)
+
+@pytest.mark.parametrize('validator, value', [
+    (validate_priority, 'Urgent'),
+    (validate_priority, ''),
+    (validate_status, 'Done'),
+    (validate_status, None)
+])
+def test_validators_reject_unknown_values(validator, value):
+    assert not validator(value)
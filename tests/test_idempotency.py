@@ -0,0 +1,72 @@
+"""
+Tests for utils/idempotency.py
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from conftest import register
+from extensions import db
+from models.idempotency_key import IdempotencyKey
+
+def post_task(client, headers, key, title='write'):
+    return client.post('/api/tasks', json={'title': title},
+                       headers={**headers, 'Idempotency-Key': key})
+
+def test_retry_replays_stored_response(client):
+    _, headers = register(client)
+    first = post_task(client, headers, 'k1')
+    retry = post_task(client, headers, 'k1')
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+
+def test_stored_response_outlives_the_lease(app, client):
+    _, headers = register(client)
+    post_task(client, headers, 'k1')
+
+    with app.app_context():
+        record = IdempotencyKey.query.one()
+        assert record.expires_at > datetime.utcnow() + timedelta(hours=1)
+
+def test_abandoned_claim_is_taken_over_after_the_lease(app, client):
+    _, headers = register(client)
+    response = post_task(client, headers, 'k1')
+    with app.app_context():
+        # Turn the stored response back into the claim of a worker that died
+        record = IdempotencyKey.query.one()
+        record.status_code = record.response_body = record.content_type = None
+        record.expires_at = datetime.utcnow() + timedelta(seconds=30)
+        db.session.commit()
+
+    assert post_task(client, headers, 'k1').status_code == 409
+
+    with app.app_context():
+        IdempotencyKey.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+    retry = post_task(client, headers, 'k1')
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert retry.get_json()['task']['id'] != response.get_json()['task']['id']
+
+def test_failed_store_releases_the_claim(app, client):
+    _, headers = register(client)
+
+    def reject_store(session, flush_context, instances):
+        if any(isinstance(obj, IdempotencyKey) and obj.status_code for obj in session.dirty):
+            raise RuntimeError('store failed')
+
+    event.listen(db.session, 'before_flush', reject_store)
+    try:
+        response = post_task(client, headers, 'k1')
+    finally:
+        event.remove(db.session, 'before_flush', reject_store)
+
+    # The task was written, so the client still gets its answer
+    assert response.status_code == 201
+    with app.app_context():
+        assert IdempotencyKey.query.count() == 0
+    assert post_task(client, headers, 'k1').status_code == 201
@@ -0,0 +1,15 @@
+"""
+Tests for GET /api/metrics
+"""
+
+def test_metrics_disabled_without_token(client):
+    assert client.get('/api/metrics').status_code == 404
+
+def test_metrics_require_the_token(make_app):
+    client = make_app(METRICS_TOKEN='s3cret').test_client()
+
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert set(response.get_json()) == {'compression', 'group_commit'}
@@ -0,0 +1,67 @@
+"""
+Tests for utils/migrations.py on a SQLite file
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.types import Integer
+
+from utils.migrations import migrate_enum_codes
+
+# The pre-migration layout: db.Enum stored member names, older rows the values
+LEGACY_ROWS = [
+    (1, 'LOW', 'PENDING'),
+    (2, 'MEDIUM', 'COMPLETED'),
+    (3, 'HIGH', 'PENDING'),
+    (4, 'High', 'Completed')
+]
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "legacy.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, '
+            'priority VARCHAR(6) NOT NULL, status VARCHAR(9) NOT NULL)'
+        ))
+        for task_id, priority, status in LEGACY_ROWS:
+            conn.execute(text('INSERT INTO tasks VALUES (:id, :title, :priority, :status)'),
+                         {'id': task_id, 'title': f't{task_id}', 'priority': priority, 'status': status})
+    yield engine
+    engine.dispose()
+
+def test_string_columns_become_codes(legacy_engine):
+    assert migrate_enum_codes(legacy_engine) == ['tasks.priority', 'tasks.status']
+
+    columns = {column['name']: column['type'] for column in inspect(legacy_engine).get_columns('tasks')}
+    assert isinstance(columns['priority'], Integer)
+    assert isinstance(columns['status'], Integer)
+    assert 'priority_code' not in columns and 'status_code' not in columns
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text('SELECT id, title, priority, status FROM tasks ORDER BY id')).all()
+    assert rows == [(1, 't1', 0, 0), (2, 't2', 1, 1), (3, 't3', 2, 0), (4, 't4', 2, 1)]
+
+def test_second_run_is_a_no_op(legacy_engine):
+    migrate_enum_codes(legacy_engine)
+    with legacy_engine.connect() as conn:
+        before = conn.execute(text('SELECT * FROM tasks ORDER BY id')).all()
+
+    assert migrate_enum_codes(legacy_engine) == []
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text('SELECT * FROM tasks ORDER BY id')).all() == before
+
+def test_unknown_values_abort_and_a_rerun_recovers(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO tasks VALUES (5, 't5', 'URGENT', 'PENDING')"))
+
+    with pytest.raises(ValueError, match='tasks.priority: 1 rows'):
+        migrate_enum_codes(legacy_engine)
+    columns = {column['name']: column['type'] for column in inspect(legacy_engine).get_columns('tasks')}
+    assert not isinstance(columns['priority'], Integer)
+
+    # The half-built code column (DDL is not transactional everywhere) is rebuilt
+    with legacy_engine.begin() as conn:
+        conn.execute(text("UPDATE tasks SET priority = 'HIGH' WHERE id = 5"))
+    assert migrate_enum_codes(legacy_engine) == ['tasks.priority', 'tasks.status']
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text('SELECT priority FROM tasks WHERE id = 5')).scalar() == 2
@@ -0,0 +1,117 @@
+"""
+Tests for the admin profiling routes
+"""
+
+import re
+import threading
+import time
+
+import pytest
+from flask import jsonify
+from sqlalchemy import event, text
+
+from config import parse_user_ids
+from conftest import register
+from extensions import db
+
+def test_only_listed_user_ids_may_profile(make_app):
+    client = make_app(PROFILER_ENABLED=True, PROFILER_ADMIN_IDS=frozenset({1})).test_client()
+    _, admin = register(client, 'admin')
+    _, other = register(client, 'mallory')
+
+    assert client.post('/api/admin/profile?seconds=0.05', headers=other).status_code == 403
+    response = client.post('/api/admin/profile?seconds=0.05&format=json', headers=admin)
+    assert response.status_code == 200
+    assert response.get_json()['mode'] == 'duration'
+
+def test_profiler_routes_absent_when_disabled(client):
+    _, headers = register(client)
+
+    assert client.post('/api/admin/profile?seconds=0.05', headers=headers).status_code == 404
+
+def test_invalid_admin_ids_are_skipped_with_a_warning():
+    with pytest.warns(UserWarning, match="ignoring 'alice'"):
+        assert parse_user_ids('1, alice,,3 ', 'PROFILER_ADMIN_IDS') == frozenset({1, 3})
+
+@pytest.fixture
+def profiled(make_app):
+    """App with the profiler on, a route spending its time in SQL, and admin headers"""
+    app = make_app(PROFILER_ENABLED=True, PROFILER_ADMIN_IDS=frozenset({1}), PROFILER_INTERVAL_MS=5)
+    with app.app_context():
+        engine = app.extensions['shard_router'].engine('default')
+    engine.dispose()
+    event.listen(engine, 'connect', lambda conn, record: conn.create_function(
+        'pause', 1, lambda ms: time.sleep(ms / 1000) or 1))
+
+    @app.get('/_test/slow_sql')
+    def slow_sql():
+        db.session.execute(text('SELECT pause(100) FROM users'))
+        return jsonify({'ok': True})
+
+    _, admin = register(app.test_client(), 'admin')
+    return app, admin
+
+def start(app, path, headers):
+    """POST a profiling request from another thread; return (thread, result holder)"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(response=app.test_client().post(path, headers=headers)))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while app.extensions['profiler']._session is None:
+        assert time.monotonic() < deadline, 'profile did not start'
+        time.sleep(0.005)
+    return thread, result
+
+def test_request_mode_reports_collapsed_stacks_with_sql_leaves(profiled):
+    app, admin = profiled
+    thread, result = start(app, '/api/admin/profile/requests?endpoint=slow_sql&count=2&timeout=5', admin)
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/_test/slow_sql').status_code == 200
+    thread.join()
+
+    response = result['response']
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines and all(re.fullmatch(r'slow_sql;\S.* \d+', line) for line in lines)
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == int(response.headers['X-Profile-Samples'])
+    assert any(';[sql] SELECT users ' in line for line in lines)
+    assert float(response.headers['X-Profile-SQL-Seconds']) > 0
+
+def test_request_mode_stops_after_count_requests(profiled):
+    app, admin = profiled
+    thread, result = start(app, '/api/admin/profile/requests?endpoint=slow_sql&count=1&timeout=5&format=json', admin)
+    client = app.test_client()
+    client.get('/_test/slow_sql')
+    thread.join()
+    # Served after the profile finished: not counted
+    client.get('/_test/slow_sql')
+
+    summary = result['response'].get_json()
+    assert summary['mode'] == 'requests' and summary['endpoint'] == 'slow_sql'
+    assert summary['sql'] == [{'statement': 'SELECT users', 'calls': 1, 'seconds': summary['sql_seconds']}]
+    assert summary['seconds'] < 5
+
+def test_request_mode_gives_up_after_the_timeout(profiled):
+    app, admin = profiled
+    response = app.test_client().post(
+        '/api/admin/profile/requests?endpoint=slow_sql&count=5&timeout=0.1&format=json', headers=admin)
+
+    summary = response.get_json()
+    assert response.status_code == 200
+    assert summary['samples'] == 0 and summary['stacks'] == ''
+    assert 0.1 <= summary['seconds'] < 1
+
+def test_second_profile_gets_409_while_one_runs(profiled):
+    app, admin = profiled
+    thread, result = start(app, '/api/admin/profile?seconds=0.5', admin)
+    client = app.test_client()
+
+    assert client.post('/api/admin/profile?seconds=0.05', headers=admin).status_code == 409
+    assert client.post('/api/admin/profile/requests?endpoint=slow_sql&timeout=0.05',
+                       headers=admin).status_code == 409
+    thread.join()
+    assert result['response'].status_code == 200
+    # Free again once the first profile finished
+    assert client.post('/api/admin/profile?seconds=0.05', headers=admin).status_code == 200
@@ -0,0 +1,48 @@
+"""
+Tests for utils/rate_limit.py
+"""
+
+from utils.rate_limit import MemoryBackend, parse_rate
+
+def test_parse_rate():
+    assert parse_rate('60/minute') == (60, 1.0)
+    assert parse_rate('5/10second') == (5, 0.5)
+
+def test_full_table_keeps_draining_buckets():
+    backend = MemoryBackend(max_keys=3)
+    # 'busy' has spent its budget; 'idle' refilled long ago
+    backend.acquire('idle', 1, 1.0, now=0)
+    backend.acquire('busy', 1, 0.001, now=99)
+    backend.acquire('other', 1, 0.001, now=99)
+
+    assert backend.acquire('new', 1, 0.001, now=100) == 0.0
+    assert backend.acquire('busy', 1, 0.001, now=100) > 0
+    assert 'idle' not in backend._buckets
+
+def test_table_stays_bounded_when_every_bucket_is_draining():
+    backend = MemoryBackend(max_keys=10)
+    for i in range(100):
+        assert backend.acquire(f'client{i}', 5, 0.001, now=i) == 0.0
+        assert len(backend._buckets) <= 10
+
+def register(client, name, forwarded_for):
+    return client.post('/api/register', json={
+        'username': name, 'email': f'{name}@example.com', 'password': 'secret123'
+    }, headers={'X-Forwarded-For': forwarded_for}).status_code
+
+def rate_limited_app(make_app, proxies):
+    return make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS={'auth.register': '1/minute'},
+                    RATE_LIMIT_BY_IP=('auth.register',), TRUSTED_PROXY_COUNT=proxies)
+
+def test_clients_behind_a_trusted_proxy_get_their_own_budget(make_app):
+    client = rate_limited_app(make_app, 1).test_client()
+
+    assert register(client, 'alice', '203.0.113.1') == 201
+    assert register(client, 'bobby', '203.0.113.2') == 201
+    assert register(client, 'carol', '203.0.113.1') == 429
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(make_app):
+    client = rate_limited_app(make_app, 0).test_client()
+
+    assert register(client, 'alice', '203.0.113.1') == 201
+    assert register(client, 'bobby', '203.0.113.2') == 429
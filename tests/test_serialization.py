@@ -0,0 +1,55 @@
+"""
+Tests for utils/serialization.py
+"""
+
+from datetime import datetime, timezone
+
+import msgpack
+import pytest
+
+from conftest import register
+from models.task import Task, Priority, Status
+from utils.serialization import MSGPACK_MIMETYPE, _msgpack_default, pack, unpack
+
+def raw_task():
+    task = Task(title='t', user_id=1, due_date=datetime(2030, 1, 2, 3, 4, 5, 678901),
+                priority=Priority.HIGH, status=Status.COMPLETED)
+    task.id = 7
+    task.created_at = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    task.updated_at = datetime(1969, 12, 31, 23, 59, 59, 500000)
+    return task.to_dict(raw=True)
+
+def test_pack_matches_generic_encoding():
+    for payload in ({'task': raw_task()}, {'tasks': [raw_task(), dict(raw_task(), archived=True)], 'count': 2}):
+        assert pack(payload) == msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+def test_pack_round_trip_uses_timestamps_and_codes():
+    task = unpack(pack({'task': raw_task()}))['task']
+
+    assert task['due_date'] == datetime(2030, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    assert task['updated_at'] == datetime(1969, 12, 31, 23, 59, 59, 500000, tzinfo=timezone.utc)
+    assert (task['priority'], task['status'], task['description']) == (2, 1, None)
+
+def test_pack_leaves_payload_untouched():
+    payload = {'task': raw_task()}
+    pack(payload)
+
+    assert payload['task']['priority'] is Priority.HIGH
+
+def test_msgpack_request_bodies_are_decoded(client):
+    _, headers = register(client)
+    response = client.post('/api/tasks', data=msgpack.packb({'title': 'packed', 'priority': 2}),
+                           content_type=MSGPACK_MIMETYPE, headers=headers)
+
+    assert response.status_code == 201
+    assert response.get_json()['task']['priority'] == 'High'
+
+@pytest.mark.parametrize('body', [b'\xc1', b'\x92\x01', msgpack.packb({'title': 't'}) + b'\x00'])
+def test_corrupt_msgpack_bodies_get_a_msgpack_400(client, body):
+    _, headers = register(client)
+    task_id = client.post('/api/tasks', json={'title': 't'}, headers=headers).get_json()['task']['id']
+
+    for method, path in (('POST', '/api/tasks'), ('PUT', f'/api/tasks/{task_id}')):
+        response = client.open(path, method=method, data=body, content_type=MSGPACK_MIMETYPE, headers=headers)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Request body is not valid msgpack'}
@@ -0,0 +1,117 @@
+"""
+Tests for utils/sharding.py on several SQLite shard files
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import register
+from models.user_shard import UserShard
+from utils.sharding import _set_placement, move_user
+
+SHARDS = ('s1', 's2', 's3')
+
+def make_sharded_app(make_app, tmp_path, **overrides):
+    return make_app(
+        TASK_SHARDS=['default', *SHARDS],
+        SQLALCHEMY_BINDS={shard: f'sqlite:///{tmp_path / f"{shard}.db"}' for shard in SHARDS},
+        **overrides
+    )
+
+@pytest.fixture
+def sharded_app(make_app, tmp_path):
+    return make_sharded_app(make_app, tmp_path)
+
+@pytest.fixture
+def users(sharded_app):
+    """Register eight users with two tasks each; return [(user id, headers)]"""
+    client = sharded_app.test_client()
+    registered = [register(client, f'user{i}') for i in range(8)]
+    for user_id, headers in registered:
+        for i in range(2):
+            response = client.post('/api/tasks', json={'title': f'{user_id}-{i}'}, headers=headers)
+            assert response.status_code == 201
+    return registered
+
+def rows_by_shard(sharded_app, tmp_path):
+    """Return shard name -> {user id: [task ids]} read straight from the files"""
+    files = {'default': tmp_path / 'primary.db', **{shard: tmp_path / f'{shard}.db' for shard in SHARDS}}
+    result = {}
+    for shard, path in files.items():
+        with sqlite3.connect(path) as conn:
+            placement = {}
+            for user_id, task_id in conn.execute('SELECT user_id, id FROM tasks ORDER BY id'):
+                placement.setdefault(user_id, []).append(task_id)
+        result[shard] = placement
+    return result
+
+def shard_of(sharded_app, user_id):
+    with sharded_app.app_context():
+        return sharded_app.extensions['shard_router'].shard_for(user_id)
+
+def test_tasks_are_stored_on_the_users_pinned_shard(sharded_app, users, tmp_path):
+    stored = rows_by_shard(sharded_app, tmp_path)
+
+    for user_id, _ in users:
+        shard = shard_of(sharded_app, user_id)
+        assert len(stored[shard][user_id]) == 2
+        assert all(user_id not in placement for name, placement in stored.items() if name != shard)
+    # Eight users spread over more than one shard
+    assert len({shard_of(sharded_app, user_id) for user_id, _ in users}) > 1
+
+    with sharded_app.app_context():
+        pinned = {entry.user_id: entry.shard for entry in UserShard.query}
+    assert pinned == {user_id: shard_of(sharded_app, user_id) for user_id, _ in users}
+
+def test_task_ids_are_unique_across_shards(sharded_app, users, tmp_path):
+    ids = [task_id for placement in rows_by_shard(sharded_app, tmp_path).values()
+           for task_ids in placement.values() for task_id in task_ids]
+
+    assert len(ids) == 16
+    assert len(set(ids)) == 16
+
+def test_writes_get_503_while_the_user_is_moving(sharded_app, users):
+    client = sharded_app.test_client()
+    user_id, headers = users[0]
+    with sharded_app.app_context():
+        _set_placement(user_id, shard_of(sharded_app, user_id), UserShard.MOVING)
+        sharded_app.extensions['shard_router'].invalidate(user_id)
+
+    response = client.post('/api/tasks', json={'title': 'blocked'}, headers=headers)
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) > 0
+    # Reads keep working during the move
+    assert client.get('/api/tasks', headers=headers).get_json()['count'] == 2
+
+def test_move_copies_flips_and_deletes(sharded_app, users, tmp_path):
+    client = sharded_app.test_client()
+    user_id, headers = users[0]
+    source = shard_of(sharded_app, user_id)
+    target = next(shard for shard in SHARDS if shard != source)
+    before = rows_by_shard(sharded_app, tmp_path)[source][user_id]
+    waits = []
+
+    with sharded_app.app_context():
+        copied = move_user(sharded_app.extensions['shard_router'], user_id, target, sleep=waits.append)
+
+    after = rows_by_shard(sharded_app, tmp_path)
+    assert copied == 2
+    assert after[target][user_id] == before
+    assert user_id not in after[source]
+    assert shard_of(sharded_app, user_id) == target
+    # Waited for caches before copying and again before deleting
+    assert len(waits) == 2
+    listed = client.get('/api/tasks', headers=headers).get_json()['tasks']
+    assert sorted(task['id'] for task in listed) == before
+    assert client.post('/api/tasks', json={'title': 'after move'}, headers=headers).status_code == 201
+
+def test_directory_cache_is_bounded(make_app, tmp_path):
+    app = make_sharded_app(make_app, tmp_path, SHARD_DIRECTORY_CACHE_SIZE=2)
+    router = app.extensions['shard_router']
+    with app.app_context():
+        for user_id in (1, 2, 3, 1):
+            router.shard_for(user_id)
+
+    # 2 was the least recently used entry
+    assert list(router._cache) == [3, 1]
@@ -0,0 +1,102 @@
+"""
+Hot/cold archival of completed tasks
+
+Completed tasks that have not changed for ARCHIVE_AFTER_DAYS are moved from
+`tasks` to `tasks_archive` in small transactions, sleeping between batches
+so the job can run against a live database without holding long locks.
+An archived task that is updated again is moved back (restore_archived_task).
+"""
+
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from models.task import Task, Status
+from models.task_archive import TaskArchive
+
+# Columns copied verbatim from tasks to tasks_archive
+ARCHIVED_COLUMNS = ('id', 'title', 'description', 'due_date', 'priority',
+                    'status', 'user_id', 'created_at', 'updated_at')
+
+def archive_completed_tasks(session, older_than_days, batch_size=500, pause_seconds=0.1, max_batches=None):
+    """
+    Move completed tasks older than the cutoff into tasks_archive
+
+    Args:
+        session (Session): Session bound to the shard being archived
+        older_than_days (int): Archive tasks last updated more than this many days ago
+        batch_size (int): Tasks moved per transaction
+        pause_seconds (float): Sleep between batches to throttle the job
+        max_batches (int): Stop after this many batches (None runs to completion)
+
+    Returns:
+        int: Number of tasks archived
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        # Lock the batch so a task reopened concurrently is not archived
+        ids = session.execute(
+            select(Task.id)
+            .where(Task.status == Status.COMPLETED, Task.updated_at < cutoff)
+            .order_by(Task.id)
+            .limit(batch_size)
+            .with_for_update()
+        ).scalars().all()
+
+        if not ids:
+            session.rollback()
+            break
+
+        try:
+            columns = [getattr(Task, name) for name in ARCHIVED_COLUMNS]
+            session.execute(
+                insert(TaskArchive).from_select(
+                    list(ARCHIVED_COLUMNS),
+                    select(*columns).where(Task.id.in_(ids))
+                )
+            )
+            session.query(Task).filter(Task.id.in_(ids)).delete(synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        archived += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    return archived
+
+def restore_archived_task(session, task_id, user_id):
+    """
+    Move an archived task back into `tasks` so it can be modified
+
+    Runs inside the caller's transaction; the caller commits.
+
+    Args:
+        session (Session): Session bound to the user's shard
+        task_id (int): Id of the archived task
+        user_id (int): Owner of the task
+
+    Returns:
+        Task: The restored task, or None if no such archived task exists
+    """
+    archived = session.query(TaskArchive).filter_by(id=task_id, user_id=user_id).first()
+    if archived is None:
+        return None
+
+    columns = [getattr(TaskArchive, name) for name in ARCHIVED_COLUMNS]
+    session.execute(
+        insert(Task).from_select(
+            list(ARCHIVED_COLUMNS),
+            select(*columns).where(TaskArchive.id == task_id)
+        )
+    )
+    session.delete(archived)
+    session.flush()
+    return session.get(Task, task_id)
@@ -0,0 +1,112 @@
+"""
+Sync and async execution of read plans
+
+A read plan is a generator that yields SQLAlchemy statements, receives each
+statement's (buffered) Result and finally returns its value; see
+routes/tasks.py. run_read() drives a plan on a regular Session inside the
+Flask views, run_read_async() drives the same plan on an AsyncSession for the
+ASGI entry point, so both serve the same queries with the same code.
+
+AsyncEngines mirrors the application's shard engines with async drivers
+(aiomysql for MySQL): while a query is in flight the event loop keeps
+serving other requests instead of parking a thread on the socket.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# Environ flag set on requests served on the ASGI event loop (asgi.py);
+# utils/profiler.py skips them since they share the loop's thread
+ASYNC_ENVIRON_KEY = 'smart_task_manager.async'
+
+# Async driver used for each sync database backend
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+def run_read(plan, session):
+    """
+    Run a read plan on a synchronous session
+
+    Args:
+        plan (generator): Read plan yielding statements
+        session (Session): Session to execute them on
+
+    Returns:
+        The plan's return value
+    """
+    try:
+        statement = next(plan)
+        while True:
+            statement = plan.send(session.execute(statement))
+    except StopIteration as done:
+        return done.value
+
+async def run_read_async(plan, session):
+    """
+    Run a read plan on an AsyncSession
+
+    Args:
+        plan (generator): Read plan yielding statements
+        session (AsyncSession): Session to execute them on
+
+    Returns:
+        The plan's return value
+    """
+    try:
+        statement = next(plan)
+        while True:
+            statement = plan.send(await session.execute(statement))
+    except StopIteration as done:
+        return done.value
+
+def async_url(url):
+    """
+    Return the async-driver equivalent of a database URL
+
+    Raises:
+        ValueError: If the backend has no supported async driver
+    """
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend} databases')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+class AsyncEngines:
+    """Async engines for the application's shards, created on first use"""
+
+    def __init__(self, app):
+        """
+        Initialize the registry
+
+        Engines are created lazily so that they belong to the serving
+        process and its event loop, never to a pre-fork master.
+
+        Args:
+            app (Flask): Application whose shard engines are mirrored
+        """
+        self.app = app
+        self._engines = {}
+
+    def engine(self, shard):
+        """Return the async engine for a shard"""
+        engine = self._engines.get(shard)
+        if engine is None:
+            with self.app.app_context():
+                url = self.app.extensions['shard_router'].engine(shard).url
+            options = dict(self.app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+            options['pool_size'] = self.app.config['ASYNC_DB_POOL_SIZE']
+            engine = create_async_engine(async_url(url), **options)
+            self._engines[shard] = engine
+        return engine
+
+    def session(self, shard):
+        """Return a new AsyncSession for a shard; use it as an async context manager"""
+        return AsyncSession(self.engine(shard), expire_on_commit=False)
+
+    async def dispose(self):
+        """Close every pooled connection (called on ASGI shutdown)"""
+        for engine in self._engines.values():
+            await engine.dispose()
+        self._engines.clear()
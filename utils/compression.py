@@ -0,0 +1,225 @@
+"""
+Negotiated response compression
+
+Installed as an after_request stage by create_app. Bodies smaller than
+COMPRESS_MIN_SIZE go out as-is, streamed responses are compressed chunk by
+chunk, and compressed variants of recently sent bodies are kept in a small
+LRU cache so identical payloads are not compressed twice. brotli and
+zstandard are used when installed; gzip is always available.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json',
+    'application/msgpack',
+    'text/plain',
+    'text/html',
+    'text/csv'
+])
+
+class _Codec:
+    """One content-coding: whole-body compression and a streaming compressor factory"""
+
+    def __init__(self, name, compress, compressobj):
+        self.name = name
+        self.compress = compress
+        # compressobj() returns an object with compress(chunk) and flush()
+        self.compressobj = compressobj
+
+class _BrotliStream:
+    """Adapt brotli.Compressor to the zlib compressobj interface"""
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk)
+
+    def flush(self):
+        return self._compressor.finish()
+
+def _gzip_codec(level):
+    return _Codec(
+        'gzip',
+        lambda body: gzip.compress(body, compresslevel=level, mtime=0),
+        lambda: zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    )
+
+def _brotli_codec(quality):
+    return _Codec(
+        'br',
+        lambda body: brotli.compress(body, quality=quality),
+        lambda: _BrotliStream(quality)
+    )
+
+def _zstd_codec(level):
+    # ZstdCompressor instances are not thread-safe; build one per call
+    return _Codec(
+        'zstd',
+        lambda body: zstandard.ZstdCompressor(level=level).compress(body),
+        lambda: zstandard.ZstdCompressor(level=level).compressobj()
+    )
+
+class CompressedVariantCache:
+    """Thread-safe LRU of (body digest, encoding) -> compressed bytes"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class Compressor:
+    """after_request stage compressing responses the client can decode"""
+
+    def __init__(self, app=None):
+        self.codecs = {}
+        self.min_size = 0
+        self.cache = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'responses_compressed': 0,
+            'responses_streamed': 0,
+            'cache_hits': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'cpu_seconds': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Build the codecs allowed by COMPRESS_ALGORITHMS and register the hook"""
+        available = {'gzip': lambda: _gzip_codec(app.config['COMPRESS_GZIP_LEVEL'])}
+        if brotli is not None:
+            available['br'] = lambda: _brotli_codec(app.config['COMPRESS_BROTLI_QUALITY'])
+        if zstandard is not None:
+            available['zstd'] = lambda: _zstd_codec(app.config['COMPRESS_ZSTD_LEVEL'])
+
+        # Dict order is the server preference used to break q-value ties
+        self.codecs = {name: available[name]() for name in app.config['COMPRESS_ALGORITHMS']
+                       if name in available}
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        cache_size = app.config['COMPRESS_CACHE_SIZE']
+        self.cache = CompressedVariantCache(cache_size) if cache_size else None
+        app.extensions['compressor'] = self
+        app.after_request(self.compress_response)
+
+    def _record(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _negotiate(self):
+        if not request.accept_encodings:
+            return None
+        name = request.accept_encodings.best_match(list(self.codecs))
+        return self.codecs.get(name) if name else None
+
+    def compress_response(self, response):
+        """Compress response in place when worthwhile and acceptable to the client"""
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        codec = self._negotiate()
+        if codec is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(codec, response.response)
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = codec.name
+            self._record(responses_streamed=1)
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        key = None
+        compressed = None
+        if self.cache is not None:
+            key = (hashlib.blake2b(body, digest_size=16).digest(), codec.name)
+            compressed = self.cache.get(key)
+
+        if compressed is None:
+            started = time.thread_time()
+            compressed = codec.compress(body)
+            self._record(cpu_seconds=time.thread_time() - started)
+            if key is not None:
+                self.cache.put(key, compressed)
+        else:
+            self._record(cache_hits=1)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = codec.name
+        self._record(responses_compressed=1, bytes_in=len(body), bytes_out=len(compressed))
+        return response
+
+    def _stream(self, codec, chunks):
+        """Compress a streamed body chunk by chunk, accounting bytes and CPU"""
+        compressor = codec.compressobj()
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                started = time.thread_time()
+                data = compressor.compress(chunk)
+                cpu += time.thread_time() - started
+                bytes_in += len(chunk)
+                if data:
+                    bytes_out += len(data)
+                    yield data
+            started = time.thread_time()
+            data = compressor.flush()
+            cpu += time.thread_time() - started
+            bytes_out += len(data)
+            yield data
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            self._record(bytes_in=bytes_in, bytes_out=bytes_out, cpu_seconds=cpu)
+
+    def snapshot(self):
+        """Return a copy of the counters with derived savings"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        stats['algorithms'] = list(self.codecs)
+        return stats
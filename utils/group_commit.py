@@ -0,0 +1,153 @@
+"""
+Group commit for task mutations
+
+Concurrent write requests hand their unit of work to a single flusher
+thread, which applies up to GROUP_COMMIT_MAX_BATCH units in one transaction
+(each inside its own SAVEPOINT) and commits once. A request only returns
+after the transaction holding its write has committed, so durability is the
+same as a per-request commit while the database pays one fsync per group.
+
+A write that is still queued when its request times out is cancelled and
+never applied; once the flusher has taken it, the request waits for the
+real outcome instead.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+class GroupCommitter:
+    """Queue of pending writes flushed in grouped transactions"""
+
+    def __init__(self, app, max_batch=64, max_delay_ms=2.0, timeout=10.0):
+        """
+        Initialize the committer
+
+        Args:
+            app (Flask): Application whose database the writes target
+            max_batch (int): Flush once this many writes are queued
+            max_delay_ms (float): Flush at most this long after the first queued write
+            timeout (float): Seconds a request waits for its write to be committed
+        """
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self.stats = {'groups': 0, 'writes': 0, 'fallbacks': 0}
+
+    def submit(self, work, shard='default'):
+        """
+        Queue a write and block until it is committed
+
+        Args:
+            work (callable): Function taking a session, applying the write and
+                returning a plain (session-independent) result
+            shard (str): Shard the write targets; groups never span shards
+
+        Returns:
+            The value returned by work
+
+        Raises:
+            TimeoutError: If the flusher did not pick the write up within the
+                timeout; the write was cancelled and will not be applied
+            Exception: Whatever work raised, or the commit error for its group
+        """
+        future = Future()
+        self._ensure_started().put((shard, work, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise TimeoutError(f'Write was not started within {self.timeout}s and was cancelled') from None
+        # Already being applied: failing now would let the write commit
+        # behind the client's back, so wait for its outcome
+        return future.result()
+
+    def _ensure_started(self):
+        """Start the flusher thread lazily, and again after a fork"""
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._queue = queue.Queue()
+                    thread = threading.Thread(target=self._run, args=(self._queue,),
+                                              name='group-commit', daemon=True)
+                    thread.start()
+                    self._pid = pid
+        return self._queue
+
+    def _collect(self, pending):
+        """Block for the first write, then gather more until size or delay is hit"""
+        group = [pending.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                group.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return group
+
+    def _run(self, pending):
+        while True:
+            group = self._collect(pending)
+            by_shard = {}
+            for shard, work, future in group:
+                # Skip writes whose request already gave up (see submit)
+                if future.set_running_or_notify_cancel():
+                    by_shard.setdefault(shard, []).append((work, future))
+
+            with self.app.app_context():
+                router = self.app.extensions['shard_router']
+                for shard, writes in by_shard.items():
+                    try:
+                        with router.open_session(shard) as session:
+                            self._flush(session, writes)
+                    except Exception as e:
+                        for _, future in writes:
+                            if not future.done():
+                                future.set_exception(e)
+
+    def _flush(self, session, group):
+        """Apply a group of writes in one transaction"""
+        results = []
+        for work, future in group:
+            try:
+                with session.begin_nested():
+                    results.append((future, work(session)))
+            except Exception as e:
+                # Only this write's SAVEPOINT is rolled back
+                future.set_exception(e)
+
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+            self.stats['fallbacks'] += 1
+            self._flush_individually(session, [(work, future) for work, future in group if not future.done()])
+            return
+
+        self.stats['groups'] += 1
+        self.stats['writes'] += len(results)
+        for future, result in results:
+            future.set_result(result)
+
+    def _flush_individually(self, session, group):
+        """Commit writes one by one so a bad write cannot fail its neighbours"""
+        for work, future in group:
+            try:
+                result = work(session)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                future.set_exception(e)
+            else:
+                self.stats['writes'] += 1
+                future.set_result(result)
@@ -0,0 +1,211 @@
+"""
+Readiness and deep health checks
+
+/api/health only says the process is up. HealthMonitor backs
+/api/health/ready and /api/health/deep with real probes of this worker:
+database round-trip latency and connection pool saturation for every shard,
+the rate limit backend, and the p99 of recent request latencies. Probe
+results are cached for HEALTH_CACHE_SECONDS so frequent load balancer checks
+cost at most one probe per worker per interval.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import create_engine, text
+
+# Health endpoints are not counted in the request latency window
+HEALTH_ENDPOINTS = frozenset(('health_check', 'health_ready', 'health_deep'))
+STARTED_KEY = 'smart_task_manager.request_started'
+
+class LatencyWindow:
+    """Ring buffer of the most recent request durations (seconds)"""
+
+    def __init__(self, size):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def snapshot(self):
+        """
+        Summarize the window
+
+        Returns:
+            dict: samples, p50_ms and p99_ms (None while the window is empty)
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'samples': 0, 'p50_ms': None, 'p99_ms': None}
+
+        def percentile(pct):
+            index = min(len(samples) - 1, int(len(samples) * pct / 100))
+            return round(samples[index] * 1000, 2)
+
+        return {'samples': len(samples), 'p50_ms': percentile(50), 'p99_ms': percentile(99)}
+
+def _pool_usage(engine):
+    """Return (checked out connections, capacity) for a QueuePool-style pool"""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return None, None
+    overflow = getattr(pool, '_max_overflow', 0)
+    return pool.checkedout(), pool.size() + max(overflow, 0)
+
+class HealthMonitor:
+    """Times requests and runs the cached readiness probes"""
+
+    def __init__(self, app=None):
+        self.latency = None
+        # Long-running diagnostics (e.g. the profiler) are added here too
+        self.excluded_endpoints = set(HEALTH_ENDPOINTS)
+        self._cached = None
+        self._lock = threading.Lock()
+        self._probe_engines = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read thresholds and register the request timing hooks"""
+        self.cache_seconds = app.config['HEALTH_CACHE_SECONDS']
+        self.max_db_latency_ms = app.config['HEALTH_MAX_DB_LATENCY_MS']
+        self.max_pool_saturation = app.config['HEALTH_MAX_POOL_SATURATION']
+        self.max_p99_ms = app.config['HEALTH_MAX_P99_MS']
+        self.min_samples = app.config['HEALTH_MIN_SAMPLES']
+        self.latency = LatencyWindow(app.config['HEALTH_LATENCY_WINDOW'])
+        self.pool_recycle = app.config['SQLALCHEMY_ENGINE_OPTIONS'].get('pool_recycle', -1)
+        app.extensions['health'] = self
+        app.before_request(self._start_timer)
+        app.teardown_request(self._record_latency)
+
+    def _start_timer(self):
+        # Stored on the environ, not g: batch sub-requests share the app context
+        request.environ[STARTED_KEY] = time.perf_counter()
+
+    def _record_latency(self, exc):
+        started = request.environ.get(STARTED_KEY)
+        if started is not None and request.endpoint not in self.excluded_endpoints:
+            self.latency.add(time.perf_counter() - started)
+
+    # Probes
+
+    def _probe_engine(self, shard, engine):
+        """
+        Return a one-connection engine for probing a shard
+
+        Probing through the application pool would block for pool_timeout
+        exactly when the pool is exhausted, which is what readiness must report.
+        """
+        probe = self._probe_engines.get(shard)
+        if probe is None:
+            probe = create_engine(engine.url, pool_size=1, max_overflow=0,
+                                  pool_recycle=self.pool_recycle)
+            self._probe_engines[shard] = probe
+        return probe
+
+    def _check_database(self, shard, engine):
+        started = time.perf_counter()
+        try:
+            with self._probe_engine(shard, engine).connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception as e:
+            # The deep probe is unauthenticated: keep hosts and drivers out of it
+            current_app.logger.warning('Health probe of shard %s failed: %s', shard, e)
+            return {'ok': False, 'error': 'Database unreachable'}
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {'ok': latency_ms <= self.max_db_latency_ms, 'latency_ms': latency_ms}
+
+    def _check_pool(self, engine):
+        checked_out, capacity = _pool_usage(engine)
+        if not capacity:
+            return {'ok': True, 'checked_out': checked_out, 'capacity': capacity}
+        saturation = round(checked_out / capacity, 3)
+        return {
+            'ok': saturation < self.max_pool_saturation,
+            'checked_out': checked_out,
+            'capacity': capacity,
+            'saturation': saturation
+        }
+
+    def _check_rate_limit_backend(self, app):
+        limiter = app.extensions.get('rate_limiter')
+        if limiter is None:
+            return {'ok': True, 'backend': None}
+        try:
+            ok = bool(limiter.backend.ping())
+        except Exception as e:
+            current_app.logger.warning('Health probe of the %s rate limit backend failed: %s',
+                                       limiter.backend.name, e)
+            return {'ok': False, 'backend': limiter.backend.name, 'error': 'Backend unreachable'}
+        return {'ok': ok, 'backend': limiter.backend.name}
+
+    def _check_latency(self):
+        summary = self.latency.snapshot()
+        enough = summary['samples'] >= self.min_samples
+        summary['ok'] = not enough or summary['p99_ms'] <= self.max_p99_ms
+        return summary
+
+    def _run_probes(self, app):
+        router = app.extensions['shard_router']
+        databases, pools = {}, {}
+        for shard in router.shards:
+            engine = router.engine(shard)
+            databases[shard] = self._check_database(shard, engine)
+            pools[shard] = self._check_pool(engine)
+
+        checks = {
+            'database': databases,
+            'pool': pools,
+            'rate_limit_backend': self._check_rate_limit_backend(app),
+            'request_latency': self._check_latency()
+        }
+
+        failing = [f'database.{shard}' for shard, result in databases.items() if not result['ok']]
+        failing += [f'pool.{shard}' for shard, result in pools.items() if not result['ok']]
+        if not checks['request_latency']['ok']:
+            failing.append('request_latency')
+        # The rate limiter fails open, so a lost backend degrades but does not
+        # make the worker unready
+        degraded = not checks['rate_limit_backend']['ok']
+
+        return {
+            'status': 'not_ready' if failing else ('degraded' if degraded else 'ready'),
+            'ready': not failing,
+            'failing': failing,
+            'checked_at': datetime.utcnow().isoformat(),
+            'checks': checks
+        }
+
+    def report(self, app):
+        """
+        Return the latest probe report, probing again once it is stale
+
+        Only one thread probes at a time; concurrent callers get the previous
+        report instead of queueing behind a slow database.
+
+        Args:
+            app (Flask): Application whose engines are probed
+
+        Returns:
+            dict: status, ready, failing, checked_at and per-check details
+        """
+        cached = self._cached
+        if cached is not None and time.monotonic() - cached[0] < self.cache_seconds:
+            return cached[1]
+
+        if not self._lock.acquire(blocking=cached is None):
+            return cached[1]
+        try:
+            cached = self._cached
+            if cached is not None and time.monotonic() - cached[0] < self.cache_seconds:
+                return cached[1]
+            report = self._run_probes(app)
+            self._cached = (time.monotonic(), report)
+            return report
+        finally:
+            self._lock.release()
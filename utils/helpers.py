@@ -5,6 +5,7 @@ Helper utility functions for the Smart Task Manager
 import re
 from datetime import datetime
 from typing import Optional
+from models.task import parse_priority, parse_status
 
 def validate_email(email: str) -> bool:
     """
@@ -99,8 +100,7 @@ def validate_priority(priority: str) -> bool:
     Returns:
         bool: True if priority is valid, False otherwise
     """
-    valid_priorities = ['low', 'medium', 'high']
-    return priority.lower() in valid_priorities
+    return parse_priority(priority) is not None
 
 def validate_status(status: str) -> bool:
     """
@@ -112,8 +112,7 @@ def validate_status(status: str) -> bool:
     Returns:
         bool: True if status is valid, False otherwise
     """
-    valid_statuses = ['pending', 'completed']
-    return status.lower() in valid_statuses
+    return parse_status(status) is not None
 
 def calculate_completion_rate(completed: int, total: int) -> float:
     """
@@ -0,0 +1,160 @@
+"""
+Idempotency-Key support for the task write routes
+
+The first request carrying a given key inserts an in-progress record; the
+unique (user_id, key_hash) index makes concurrent duplicates fail that insert
+instead of running the handler a second time. The in-progress record is only
+a lease of IDEMPOTENCY_LOCK_SECONDS, so a key whose worker died can be
+claimed again. Once the handler finishes its status and body are stored, and
+retries within IDEMPOTENCY_KEY_TTL get the stored response back without
+touching the tasks table.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.idempotency_key import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+def _sha256(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def _replay(record):
+    """Build the response for a key that has already been used"""
+    if record.status_code is None:
+        response = jsonify({'error': 'A request with this Idempotency-Key is still in progress'})
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+
+    response = make_response(record.response_body or b'', record.status_code)
+    if record.content_type:
+        response.headers['Content-Type'] = record.content_type
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _claim(user_id, key_hash, request_hash):
+    """
+    Try to insert an in-progress record for the key
+
+    Returns:
+        tuple: (claimed record, None) or (None, existing record)
+    """
+    # Held only for the lease; extended to the full TTL once a response is stored
+    expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_SECONDS'])
+    for _ in range(2):
+        record = IdempotencyKey(user_id, key_hash, request_hash, expires_at)
+        db.session.add(record)
+        try:
+            db.session.commit()
+            return record, None
+        except IntegrityError:
+            db.session.rollback()
+
+        existing = IdempotencyKey.query.filter_by(user_id=user_id, key_hash=key_hash).first()
+        if existing is None:
+            continue
+        if not existing.is_expired():
+            return None, existing
+        # Expired records and abandoned leases are treated as absent. Delete
+        # only the row we saw, in case another request took it over meanwhile.
+        IdempotencyKey.query.filter_by(id=existing.id, expires_at=existing.expires_at).delete()
+        db.session.commit()
+    raise RuntimeError('Could not claim idempotency key')
+
+def _release(record_id):
+    """Delete an in-progress record so the key can be retried at once"""
+    try:
+        IdempotencyKey.query.filter_by(id=record_id, status_code=None).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # The lease expires by itself
+        current_app.logger.exception('Could not release idempotency key %s', record_id)
+
+def idempotent(view):
+    """
+    Decorator making a JWT-protected write route honour Idempotency-Key
+
+    Must be applied below @jwt_required() so the caller's identity is known.
+    Requests without the header are passed straight through. Inside an
+    atomic batch the key is ignored, since the batch may still roll back.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or g.get('defer_commit'):
+            return view(*args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        user_id = get_jwt_identity()
+        key_hash = _sha256(key)
+        request_hash = _sha256(request.method, request.path, request.get_data(cache=True))
+
+        record, existing = _claim(user_id, key_hash, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+            return _replay(existing)
+        record_id = record.id
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            _release(record_id)
+            raise
+
+        if response.status_code >= 500:
+            # Server errors are not stored, so the client can retry them
+            _release(record_id)
+            return response
+
+        try:
+            record.status_code = response.status_code
+            record.response_body = response.get_data()
+            record.content_type = response.headers.get('Content-Type')
+            record.expires_at = datetime.utcnow() + current_app.config['IDEMPOTENCY_KEY_TTL']
+            db.session.commit()
+        except Exception:
+            # The write itself succeeded; only its replay is lost
+            db.session.rollback()
+            current_app.logger.exception('Could not store the response for idempotency key %s', record_id)
+            _release(record_id)
+        return response
+
+    return wrapper
+
+def purge_expired_keys(batch_size=1000):
+    """
+    Delete expired idempotency records in batches
+
+    Args:
+        batch_size (int): Rows deleted per transaction
+
+    Returns:
+        int: Number of records deleted
+    """
+    deleted = 0
+    while True:
+        ids = [row.id for row in IdempotencyKey.query
+               .with_entities(IdempotencyKey.id)
+               .filter(IdempotencyKey.expires_at < datetime.utcnow())
+               .limit(batch_size)]
+        if not ids:
+            return deleted
+        IdempotencyKey.query.filter(IdempotencyKey.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
@@ -0,0 +1,68 @@
+"""
+In-place schema migrations run from the CLI (see commands.py)
+
+There is no migration framework in this project; each migration checks the
+live schema first, so running it twice (or on a fresh database created by
+init-db) is a no-op.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.types import Integer
+from models.task import PRIORITY_CODES, STATUS_CODES
+
+# Tables whose priority/status columns switched from strings to SMALLINT codes
+ENUM_CODE_TABLES = ('tasks', 'tasks_archive')
+ENUM_CODE_COLUMNS = {'priority': PRIORITY_CODES, 'status': STATUS_CODES}
+
+def _code_case(column, codes):
+    """CASE expression mapping stored names (db.Enum wrote member names) to codes"""
+    branches = ' '.join(
+        f"WHEN '{member.name}' THEN {code} WHEN '{member.value}' THEN {code}"
+        for member, code in codes.items()
+    )
+    return f'CASE {column} {branches} END'
+
+def migrate_enum_codes(engine):
+    """
+    Convert string priority/status columns to SMALLINT codes
+
+    Each column is rewritten through a temporary ``<column>_code`` column:
+    add it, fill it from the names, drop the string column and rename the
+    code column into its place. Run it while the API is stopped; rows
+    written by older code during the copy would be missed.
+
+    Args:
+        engine (Engine): Engine of the database (or shard) to migrate
+
+    Returns:
+        list: "table.column" names that were converted
+    """
+    converted = []
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in ENUM_CODE_TABLES:
+            if table not in existing:
+                continue
+            types = {column['name']: column['type'] for column in inspector.get_columns(table)}
+            for column, codes in ENUM_CODE_COLUMNS.items():
+                if column not in types or isinstance(types[column], Integer):
+                    continue
+                temp = f'{column}_code'
+                if temp in types:
+                    # Left over from an interrupted run (MySQL DDL is not transactional)
+                    conn.execute(text(f'ALTER TABLE {table} DROP COLUMN {temp}'))
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {temp} SMALLINT'))
+                conn.execute(text(f'UPDATE {table} SET {temp} = {_code_case(column, codes)}'))
+                unknown = conn.execute(text(f'SELECT COUNT(*) FROM {table} WHERE {temp} IS NULL')).scalar()
+                if unknown:
+                    raise ValueError(f'{table}.{column}: {unknown} rows hold values without a code')
+                conn.execute(text(f'ALTER TABLE {table} DROP COLUMN {column}'))
+                if engine.dialect.name == 'mysql':
+                    conn.execute(text(f'ALTER TABLE {table} CHANGE COLUMN {temp} {column} SMALLINT NOT NULL'))
+                else:
+                    conn.execute(text(f'ALTER TABLE {table} RENAME COLUMN {temp} TO {column}'))
+                converted.append(f'{table}.{column}')
+
+    return converted
@@ -0,0 +1,245 @@
+"""
+Opt-in sampling profiler for live diagnosis (see routes/profiler.py)
+
+Only installed when PROFILER_ENABLED is set; otherwise no hook, event
+listener or route exists. While a profile runs, a daemon thread reads
+sys._current_frames() every PROFILER_INTERVAL_MS and counts the stacks of
+threads that are serving requests. A thread that is inside a database call
+at that moment gets an extra ``[sql] <verb> <table>`` leaf frame, so SQL time
+shows up in the flamegraph next to the Python code that issued it. Output is
+the collapsed-stack format read by flamegraph.pl and speedscope.
+
+One profile runs at a time per worker process and every profile is bounded
+by time (and, in request mode, by count), so it is safe under live load.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.async_db import ASYNC_ENVIRON_KEY
+
+# Thread names sampled in duration mode besides request threads
+BACKGROUND_THREADS = ('group-commit',)
+SQL_TARGET = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+[`"\[]?(\w+)', re.IGNORECASE)
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+def _sql_label(statement):
+    """Reduce a statement to '<VERB> <table>' so identical queries aggregate"""
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else '?'
+    match = SQL_TARGET.search(statement)
+    return f'{verb} {match.group(1)}' if match else verb
+
+def _frame_name(code):
+    return f'{getattr(code, "co_qualname", code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+class ProfileSession:
+    """State of one running profile"""
+
+    def __init__(self, mode, endpoint=None, remaining=0):
+        self.mode = mode
+        self.endpoint = endpoint
+        self.remaining = remaining
+        self.stacks = Counter()
+        self.sql = {}
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        # Thread ident -> root frame label for threads being profiled (request mode)
+        self.tracked = {}
+        self.done = threading.Event()
+
+    def record_sql(self, label, seconds):
+        calls, total = self.sql.get(label, (0, 0.0))
+        self.sql[label] = (calls + 1, total + seconds)
+
+    def collapsed(self):
+        """Return the samples as 'frame;frame;frame count' lines"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def summary(self):
+        """Return a JSON-ready description of the profile"""
+        sql = sorted(self.sql.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'mode': self.mode,
+            'endpoint': self.endpoint,
+            'samples': self.samples,
+            'seconds': round((self.finished or time.perf_counter()) - self.started, 3),
+            'sql_seconds': round(sum(total for _, total in self.sql.values()), 6),
+            'sql': [
+                {'statement': label, 'calls': calls, 'seconds': round(total, 6)}
+                for label, (calls, total) in sql
+            ],
+            'stacks': self.collapsed()
+        }
+
+class SamplingProfiler:
+    """Stack sampler driven by the admin profiling routes"""
+
+    def __init__(self, app=None):
+        self._session = None
+        self._lock = threading.Lock()
+        # Thread ident -> endpoint for every request in flight in this process
+        self._busy = {}
+        # Thread ident -> (sql label, start) while a cursor call is running
+        self._in_sql = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register request and SQL hooks (only called when PROFILER_ENABLED)"""
+        self.interval = max(app.config['PROFILER_INTERVAL_MS'], 1) / 1000.0
+        self.max_depth = app.config['PROFILER_MAX_DEPTH']
+        app.extensions['profiler'] = self
+        app.before_request(self._request_started)
+        app.teardown_request(self._request_finished)
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(Engine, 'handle_error', self._cursor_failed)
+
+    # Request tracking
+
+    def _request_started(self):
+        # Reads served on the ASGI event loop share one thread; not sampled
+        if request.blueprint == 'profiler' or request.environ.get(ASYNC_ENVIRON_KEY):
+            return
+        ident = threading.get_ident()
+        # Batch sub-requests run on the batch request's thread
+        request.environ['smart_task_manager.outer_endpoint'] = self._busy.get(ident)
+        self._busy[ident] = request.endpoint
+        session = self._session
+        if session is None or session.mode != 'requests' or request.endpoint != session.endpoint:
+            return
+        with self._lock:
+            if session.remaining > 0:
+                session.remaining -= 1
+                session.tracked[ident] = request.endpoint
+                request.environ['smart_task_manager.profiled'] = True
+
+    def _request_finished(self, exc):
+        if request.blueprint == 'profiler' or request.environ.get(ASYNC_ENVIRON_KEY):
+            return
+        ident = threading.get_ident()
+        outer = request.environ.get('smart_task_manager.outer_endpoint')
+        if outer is None:
+            self._busy.pop(ident, None)
+        else:
+            self._busy[ident] = outer
+        if not request.environ.pop('smart_task_manager.profiled', False):
+            return
+        session = self._session
+        if session is None:
+            return
+        with self._lock:
+            session.tracked.pop(ident, None)
+            if session.remaining == 0 and not session.tracked:
+                session.done.set()
+
+    # SQL timing
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._session is not None:
+            self._in_sql[threading.get_ident()] = (_sql_label(statement), time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        ident = threading.get_ident()
+        started = self._in_sql.pop(ident, None)
+        session = self._session
+        if started is None or session is None:
+            return
+        if session.mode == 'duration' or ident in session.tracked:
+            session.record_sql(started[0], time.perf_counter() - started[1])
+
+    def _cursor_failed(self, context):
+        self._in_sql.pop(threading.get_ident(), None)
+
+    # Sampling
+
+    def _labels(self, session):
+        """Return thread ident -> root label for the threads to sample now"""
+        if session.mode == 'requests':
+            return dict(session.tracked)
+        labels = dict(self._busy)
+        for thread in threading.enumerate():
+            if thread.name in BACKGROUND_THREADS:
+                labels[thread.ident] = thread.name
+        return labels
+
+    def _sample(self, session):
+        while not session.done.wait(self.interval):
+            labels = self._labels(session)
+            if not labels:
+                continue
+            frames = sys._current_frames()
+            for ident, label in labels.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.max_depth:
+                    names.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                names.append(label or 'unknown')
+                names.reverse()
+                in_sql = self._in_sql.get(ident)
+                if in_sql is not None:
+                    names.append(f'[sql] {in_sql[0]}')
+                session.stacks[';'.join(names)] += 1
+                session.samples += 1
+
+    def _run(self, session, timeout):
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusyError('A profile is already running in this worker')
+            self._session = session
+        sampler = threading.Thread(target=self._sample, args=(session,), name='profiler', daemon=True)
+        try:
+            sampler.start()
+            session.done.wait(timeout)
+        finally:
+            session.done.set()
+            sampler.join()
+            session.finished = time.perf_counter()
+            with self._lock:
+                self._session = None
+            self._in_sql.clear()
+        return session
+
+    def profile_for(self, seconds):
+        """
+        Sample every request thread of this worker for a number of seconds
+
+        Args:
+            seconds (float): Profile duration
+
+        Returns:
+            ProfileSession: The finished profile
+
+        Raises:
+            ProfilerBusyError: If another profile is running
+        """
+        return self._run(ProfileSession('duration'), seconds)
+
+    def profile_requests(self, endpoint, count, timeout):
+        """
+        Sample the next requests to one endpoint served by this worker
+
+        Args:
+            endpoint (str): Flask endpoint name, e.g. 'tasks.get_tasks'
+            count (int): Number of requests to profile
+            timeout (float): Give up waiting for requests after this many seconds
+
+        Returns:
+            ProfileSession: The finished profile (possibly with fewer requests)
+
+        Raises:
+            ProfilerBusyError: If another profile is running
+        """
+        return self._run(ProfileSession('requests', endpoint, count), timeout)
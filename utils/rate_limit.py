@@ -0,0 +1,198 @@
+"""
+Per-route rate limiting with token buckets
+
+Budgets are configured per endpoint in RATE_LIMITS, e.g.
+``{'tasks.create_task': '60/minute'}``. Authenticated routes are keyed by JWT
+identity and login/register by client IP (see RATE_LIMIT_BY_IP). Buckets
+live in a backend: the default MemoryBackend is per-process, RedisBackend
+shares budgets between workers. Client IPs come from request.remote_addr,
+which create_app rewrites from X-Forwarded-For when TRUSTED_PROXY_COUNT is
+set.
+"""
+
+import threading
+import time
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+def parse_rate(rate):
+    """
+    Parse a rate string such as "60/minute" or "5/10second"
+
+    Args:
+        rate (str): "<count>/<period>" where period may have a multiplier
+
+    Returns:
+        tuple: (capacity, refill rate in tokens per second)
+    """
+    count, _, period = rate.partition('/')
+    multiplier = ''.join(ch for ch in period if ch.isdigit())
+    unit = period[len(multiplier):].strip().lower().rstrip('s')
+    if unit not in PERIODS:
+        raise ValueError(f'Invalid rate limit period: {rate}')
+    seconds = PERIODS[unit] * (int(multiplier) if multiplier else 1)
+    capacity = int(count)
+    return capacity, capacity / seconds
+
+class MemoryBackend:
+    """
+    In-process token buckets
+
+    Each bucket is an immutable (tokens, timestamp, full_at) tuple that is
+    replaced with a single dict assignment, so no lock is taken on the
+    request path. Under a race two requests may both read the same state and
+    one refill or debit is lost; that only makes the limit marginally
+    approximate.
+
+    At max_keys, buckets that have refilled completely (full_at has passed)
+    are dropped: a missing bucket starts full, so forgetting them changes
+    nothing. Only if that does not free a tenth of the table are the oldest
+    buckets dropped as well.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys=100000):
+        self._buckets = {}
+        self._evict_lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def acquire(self, key, capacity, refill_rate, now=None):
+        """
+        Take one token from the bucket for key
+
+        Returns:
+            float: 0.0 when allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        tokens, stamp, _ = self._buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+        if tokens >= 1:
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._evict(now)
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / refill_rate
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_rate)
+        return wait
+
+    def _evict(self, now):
+        """Make room for new keys, dropping refilled buckets first"""
+        with self._evict_lock:
+            if len(self._buckets) < self.max_keys:
+                return
+            for key, (_, _, full_at) in list(self._buckets.items()):
+                if full_at <= now:
+                    self._buckets.pop(key, None)
+            # Every bucket is still draining: drop the oldest so one sweep
+            # makes room for many new keys
+            excess = len(self._buckets) - self.max_keys * 9 // 10
+            if excess > 0:
+                for key in list(self._buckets)[:excess]:
+                    self._buckets.pop(key, None)
+
+    def ping(self):
+        """Check that the backend is usable"""
+        return True
+
+class RedisBackend:
+    """Token buckets shared by all workers through Redis"""
+
+    name = 'redis'
+
+    # Refill and debit atomically on the server; returns the wait in ms
+    SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return wait
+"""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def acquire(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        wait_ms = self._script(keys=[f'ratelimit:{key}'], args=[capacity, refill_rate, now])
+        return int(wait_ms) / 1000.0
+
+    def ping(self):
+        return bool(self._client.ping())
+
+class RateLimiter:
+    """Checks the configured budget for each request before it is dispatched"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.limits = {}
+        self.by_ip = frozenset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read budgets from the app config and install the before_request hook"""
+        self.limits = {endpoint: parse_rate(rate) for endpoint, rate in app.config['RATE_LIMITS'].items()}
+        self.by_ip = frozenset(app.config['RATE_LIMIT_BY_IP'])
+        storage_url = app.config['RATE_LIMIT_STORAGE_URL']
+        self.backend = RedisBackend(storage_url) if storage_url else MemoryBackend()
+        app.extensions['rate_limiter'] = self
+        app.before_request(self.check)
+
+    def _identity(self, endpoint):
+        if endpoint in self.by_ip:
+            return f'ip:{request.remote_addr}'
+        # Limits are checked before the view's own @jwt_required runs; the
+        # token is only decoded once thanks to the per-context cache.
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None
+        if identity is None:
+            return f'ip:{request.remote_addr}'
+        return f'user:{identity}'
+
+    def check(self):
+        """before_request hook returning a 429 response when over budget"""
+        endpoint = request.endpoint
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return None
+
+        capacity, refill_rate = limit
+        try:
+            wait = self.backend.acquire(f'{endpoint}:{self._identity(endpoint)}', capacity, refill_rate)
+        except Exception:
+            # Fail open: an unavailable shared backend must not take the API down
+            current_app.logger.exception('Rate limit backend unavailable')
+            return None
+
+        if wait <= 0:
+            return None
+
+        response = jsonify({'error': 'Too many requests', 'message': 'Rate limit exceeded, retry later'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, int(wait + 0.999)))
+        return response
@@ -0,0 +1,143 @@
+"""
+Content negotiation between JSON and MessagePack for the task routes
+
+Route handlers build payloads from raw task dictionaries
+(``task.to_dict(raw=True)``) and return them through respond(). JSON clients
+get ISO datetimes and enum values exactly as Task.to_dict() produces them;
+clients sending ``Accept: application/msgpack`` get native msgpack
+timestamps and the compact PRIORITY_CODES / STATUS_CODES integers.
+
+The gain is size (about 40% smaller for task lists); msgpack does not decode
+measurably faster than JSON here. See benchmarks/serialization_bench.py.
+"""
+
+from datetime import date, datetime, timezone
+from enum import Enum
+import msgpack
+from flask import jsonify, make_response, request
+from flask.json.provider import DefaultJSONProvider
+from models.task import (PRIORITY_CODES, STATUS_CODES, PRIORITY_BY_CODE, STATUS_BY_CODE,
+                         DATETIME_FIELDS, ENUM_FIELDS)
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+JSON_MIMETYPE = 'application/json'
+
+ENUM_CODES = {**PRIORITY_CODES, **STATUS_CODES}
+EPOCH = datetime(1970, 1, 1)
+
+class MalformedBodyError(ValueError):
+    """Raised when a msgpack request body cannot be decoded"""
+
+class TaskJSONProvider(DefaultJSONProvider):
+    """JSON provider rendering raw task values the way Task.to_dict() does"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        if isinstance(o, Enum):
+            return o.value
+        return DefaultJSONProvider.default(o)
+
+def _msgpack_default(obj):
+    if isinstance(obj, datetime):
+        # Stored datetimes are naive UTC
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(obj)
+    if isinstance(obj, Enum):
+        return ENUM_CODES[obj]
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not msgpack serializable')
+
+def _msgpack_task(data):
+    """Copy a raw task dictionary with its known fields already converted"""
+    data = dict(data)
+    for field in DATETIME_FIELDS:
+        value = data[field]
+        if value is not None:
+            # Stored datetimes are naive UTC
+            delta = value - EPOCH
+            data[field] = msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+    for field in ENUM_FIELDS:
+        value = data[field]
+        if value is not None:
+            data[field] = ENUM_CODES[value]
+    return data
+
+def pack(payload):
+    """
+    Encode a payload with native timestamps and enum codes
+
+    Task dictionaries under 'task' / 'tasks' are converted field by field
+    up front, which avoids a default= callback per datetime and enum; any
+    other such value still goes through _msgpack_default.
+    """
+    if isinstance(payload, dict) and ('task' in payload or 'tasks' in payload):
+        payload = dict(payload)
+        if isinstance(payload.get('task'), dict):
+            payload['task'] = _msgpack_task(payload['task'])
+        if isinstance(payload.get('tasks'), list):
+            payload['tasks'] = [_msgpack_task(task) for task in payload['tasks']]
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+def unpack(data):
+    """Decode a msgpack body; timestamps become timezone-aware datetimes"""
+    return msgpack.unpackb(data, raw=False, timestamp=3)
+
+def wants_msgpack():
+    """Check whether the client prefers a msgpack response"""
+    return request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+def respond(payload, status=200):
+    """
+    Render payload as msgpack or JSON according to the Accept header
+
+    Args:
+        payload (dict): Response body; may contain datetimes and enums
+        status (int): HTTP status code
+
+    Returns:
+        tuple: (Response, status) as expected from a Flask view
+    """
+    if wants_msgpack():
+        response = make_response(pack(payload))
+        response.mimetype = MSGPACK_MIMETYPE
+        return response, status
+    return jsonify(payload), status
+
+def _normalize_incoming(data):
+    """Map msgpack-native values to what the JSON API accepts (codes become enum members)"""
+    if not isinstance(data, dict):
+        return data
+    for field, by_code in (('priority', PRIORITY_BY_CODE), ('status', STATUS_BY_CODE)):
+        value = data.get(field)
+        if isinstance(value, int) and not isinstance(value, bool):
+            data[field] = by_code.get(value, str(value))
+    for field, value in data.items():
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            data[field] = value.isoformat()
+    return data
+
+def get_request_data():
+    """
+    Parse the request body as msgpack or JSON according to Content-Type
+
+    Returns:
+        Optional[dict]: Parsed payload, or None when there is no body
+
+    Raises:
+        MalformedBodyError: If a msgpack body cannot be decoded
+    """
+    if request.mimetype == MSGPACK_MIMETYPE:
+        body = request.get_data(cache=True)
+        if not body:
+            return None
+        try:
+            return _normalize_incoming(unpack(body))
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise MalformedBodyError('Request body is not valid msgpack') from e
+    return request.get_json()
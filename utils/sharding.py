@@ -0,0 +1,343 @@
+"""
+Horizontal sharding of tasks by user_id
+
+Every user's tasks (and archived tasks) live on exactly one shard. Shards are
+the database binds named in TASK_SHARDS; 'default' is the primary database,
+which also holds users, the shard directory and idempotency keys. A user is
+placed with a consistent-hash ring the first time they are seen, and that
+placement is pinned in the `user_shards` directory so adding shards later
+never moves existing users implicitly. move_user() rebalances one user online.
+
+With a single 'default' shard (the default configuration) the router hands
+out db.session and never touches the directory; task ids still come from
+id_sequences (see new_task_id).
+"""
+
+import bisect
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import g
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from extensions import db
+from models.task import Task
+from models.task_archive import TaskArchive
+from models.user_shard import UserShard, IdSequence
+
+DEFAULT_SHARD = 'default'
+SHARDED_MODELS = (Task, TaskArchive)
+TASK_ID_SEQUENCE = 'tasks'
+
+class ShardMovingError(Exception):
+    """Raised for writes to a user whose tasks are being moved between shards"""
+
+    def __init__(self, user_id, retry_after):
+        super().__init__(f'Tasks for user {user_id} are being moved; retry later')
+        self.retry_after = retry_after
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes"""
+
+    def __init__(self, shards, vnodes=64):
+        points = sorted((_hash(f'{shard}#{i}'), shard) for shard in shards for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def get(self, key):
+        index = bisect.bisect(self._keys, _hash(str(key))) % len(self._keys)
+        return self._shards[index]
+
+class _IdAllocator:
+    """Hands out task ids from blocks reserved in the id_sequences table (hi/lo)"""
+
+    def __init__(self, router, block_size):
+        self.router = router
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = self._reserve()
+                self._limit = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    def _reserve(self):
+        """Reserve the next block in its own short transaction"""
+        for _ in range(2):
+            with Session(db.engine) as session:
+                sequence = session.execute(
+                    select(IdSequence).where(IdSequence.name == TASK_ID_SEQUENCE).with_for_update()
+                ).scalar_one_or_none()
+                if sequence is None:
+                    # Start above every id already handed out by autoincrement
+                    session.add(IdSequence(TASK_ID_SEQUENCE, self.router.max_task_id() + 1))
+                    try:
+                        session.commit()
+                    except IntegrityError:
+                        session.rollback()
+                    continue
+                start = sequence.next_value
+                sequence.next_value = start + self.block_size
+                session.commit()
+                return start
+        raise RuntimeError('Could not reserve a task id block')
+
+class ShardRouter:
+    """Maps user ids to shards and provides sessions bound to them"""
+
+    def __init__(self, app=None):
+        self.shards = [DEFAULT_SHARD]
+        self.ring = None
+        self.cache_ttl = 0
+        self.cache_size = 0
+        # LRU of user id -> (shard, state, expiry)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._ids = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read TASK_SHARDS and register the session teardown"""
+        self.shards = list(app.config['TASK_SHARDS']) or [DEFAULT_SHARD]
+        self.ring = HashRing(self.shards)
+        self.cache_ttl = app.config['SHARD_DIRECTORY_CACHE_SECONDS']
+        self.cache_size = app.config['SHARD_DIRECTORY_CACHE_SIZE']
+        self.move_grace = app.config['SHARD_MOVE_GRACE_SECONDS']
+        self._ids = _IdAllocator(self, app.config['SHARD_ID_BLOCK_SIZE'])
+        app.extensions['shard_router'] = self
+        app.teardown_appcontext(self._close_sessions)
+
+    @property
+    def sharded(self):
+        return self.shards != [DEFAULT_SHARD]
+
+    # Placement
+
+    def engine(self, shard):
+        """Return the engine for a shard name"""
+        return db.engine if shard == DEFAULT_SHARD else db.engines[shard]
+
+    def _lookup(self, user_id):
+        """Return (shard, state) for a user, pinning new users on the ring"""
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached[2] > now:
+                self._cache.move_to_end(user_id)
+                return cached[0], cached[1]
+
+        with Session(db.engine) as session:
+            entry = session.get(UserShard, user_id)
+            if entry is None:
+                entry = UserShard(user_id, self.ring.get(user_id))
+                session.add(entry)
+                try:
+                    session.commit()
+                except IntegrityError:
+                    # Another worker pinned the user first
+                    session.rollback()
+                    entry = session.get(UserShard, user_id)
+            placement = (entry.shard, entry.state)
+
+        with self._cache_lock:
+            self._cache[user_id] = (placement[0], placement[1], now + self.cache_ttl)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return placement
+
+    def shard_for(self, user_id):
+        """Return the shard holding a user's tasks"""
+        if not self.sharded:
+            return DEFAULT_SHARD
+        return self._lookup(int(user_id))[0]
+
+    def ensure_writable(self, user_id):
+        """Raise ShardMovingError while the user's tasks are being moved"""
+        if self.sharded and self._lookup(int(user_id))[1] == UserShard.MOVING:
+            raise ShardMovingError(user_id, self.cache_ttl + self.move_grace)
+
+    def invalidate(self, user_id):
+        with self._cache_lock:
+            self._cache.pop(int(user_id), None)
+
+    # Sessions
+
+    def session(self, shard):
+        """Return the request-scoped session for a shard"""
+        if shard == DEFAULT_SHARD:
+            return db.session
+        sessions = g.setdefault('_shard_sessions', {})
+        if shard not in sessions:
+            sessions[shard] = Session(bind=self.engine(shard))
+        return sessions[shard]
+
+    def session_for(self, user_id):
+        """Return the request-scoped session for a user's shard"""
+        return self.session(self.shard_for(user_id))
+
+    def open_session(self, shard):
+        """Return a new session for a shard; the caller must close it"""
+        return Session(bind=self.engine(shard))
+
+    def request_sessions(self):
+        """Return the non-default shard sessions opened in this context"""
+        return list(g.get('_shard_sessions', {}).values())
+
+    def _close_sessions(self, exc):
+        for session in g.pop('_shard_sessions', {}).values():
+            session.close()
+
+    # Ids and schema
+
+    def new_task_id(self):
+        """
+        Return a globally unique task id
+
+        Ids come from id_sequences even with a single shard: archiving
+        deletes rows from `tasks`, and an autoincrement column (SQLite, or
+        MySQL before 8.0 after a restart) would hand the highest archived id
+        out again.
+        """
+        return self._ids.next_id()
+
+    def max_task_id(self):
+        """Return the highest task id stored on any shard"""
+        highest = 0
+        for shard in self.shards:
+            with self.open_session(shard) as session:
+                for model in SHARDED_MODELS:
+                    highest = max(highest, session.scalar(select(func.max(model.id))) or 0)
+        return highest
+
+    def create_tables(self):
+        """Create the task tables on every non-default shard"""
+        tables = [model.__table__ for model in SHARDED_MODELS]
+        for shard in self.shards:
+            if shard != DEFAULT_SHARD:
+                db.metadata.create_all(self.engine(shard), tables=tables)
+
+    def pin_unassigned_users(self, shard=DEFAULT_SHARD):
+        """
+        Pin every user without a directory entry to one shard
+
+        Run this once when enabling sharding on an existing database, so
+        that users whose tasks are on the primary database stay there.
+
+        Returns:
+            int: Number of users pinned
+        """
+        from models.user import User
+        with Session(db.engine) as session:
+            user_ids = session.scalars(
+                select(User.id).where(~User.id.in_(select(UserShard.user_id)))
+            ).all()
+            for user_id in user_ids:
+                session.add(UserShard(user_id, shard))
+            session.commit()
+        with self._cache_lock:
+            self._cache.clear()
+        return len(user_ids)
+
+def _copy_rows(model, source, target, user_id, batch_size):
+    """Copy one user's rows of a sharded model in id order"""
+    columns = [column.key for column in model.__table__.columns]
+    last_id = 0
+    copied = 0
+    while True:
+        rows = source.execute(
+            select(model.__table__)
+            .where(model.user_id == user_id, model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return copied
+        target.execute(insert(model.__table__), [{key: row[key] for key in columns} for row in rows])
+        last_id = rows[-1]['id']
+        copied += len(rows)
+
+def _delete_rows(session, user_id, batch_size):
+    """Delete one user's sharded rows in batches"""
+    for model in SHARDED_MODELS:
+        while True:
+            ids = session.scalars(
+                select(model.id).where(model.user_id == user_id).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+            session.commit()
+
+def _set_placement(user_id, shard, state):
+    with Session(db.engine) as session:
+        entry = session.get(UserShard, user_id)
+        if entry is None:
+            session.add(UserShard(user_id, shard, state))
+        else:
+            entry.shard = shard
+            entry.state = state
+        session.commit()
+
+def move_user(router, user_id, target, batch_size=500, sleep=time.sleep):
+    """
+    Move one user's tasks to another shard while the API keeps serving
+
+    1. Mark the user 'moving' and wait until every worker's directory cache
+       has seen it, so new writes get 503 + Retry-After while reads continue.
+    2. Copy tasks and archived tasks to the target shard.
+    3. Point the directory at the target and mark the user active again.
+    4. Wait for stale caches to expire, then delete the source rows.
+
+    Args:
+        router (ShardRouter): Router of the running application
+        user_id (int): User to move
+        target (str): Destination shard name
+        batch_size (int): Rows copied/deleted per statement
+
+    Returns:
+        int: Number of rows copied
+    """
+    user_id = int(user_id)
+    if target not in router.shards:
+        raise ValueError(f'Unknown shard: {target}')
+
+    source = router.shard_for(user_id)
+    if source == target:
+        return 0
+
+    settle = router.cache_ttl + router.move_grace
+    _set_placement(user_id, source, UserShard.MOVING)
+    router.invalidate(user_id)
+    sleep(settle)
+
+    copied = 0
+    with router.open_session(source) as source_session, router.open_session(target) as target_session:
+        try:
+            for model in SHARDED_MODELS:
+                copied += _copy_rows(model, source_session, target_session, user_id, batch_size)
+            target_session.commit()
+        except Exception:
+            target_session.rollback()
+            _set_placement(user_id, source, UserShard.ACTIVE)
+            router.invalidate(user_id)
+            raise
+
+        _set_placement(user_id, target, UserShard.ACTIVE)
+        router.invalidate(user_id)
+        sleep(settle)
+        _delete_rows(source_session, user_id, batch_size)
+
+    return copied
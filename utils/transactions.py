@@ -0,0 +1,64 @@
+"""
+Transaction helpers shared by the route handlers
+"""
+
+from flask import current_app, g
+from extensions import db
+
+def commit_session(session=None):
+    """
+    Commit a database session (the default session unless one is given)
+
+    When an outer caller owns the transaction (an atomic batch request sets
+    ``g.defer_commit``), pending changes are only flushed so that the caller
+    can commit or roll back everything at once.
+    """
+    session = session or db.session
+    if g.get('defer_commit'):
+        session.flush()
+    else:
+        session.commit()
+
+def request_sessions():
+    """Return every session used in this context: shard sessions, then the default one"""
+    return current_app.extensions['shard_router'].request_sessions() + [db.session]
+
+def commit_request_sessions():
+    """Commit all sessions used in this context (see request_sessions)"""
+    for session in request_sessions():
+        session.commit()
+
+def rollback_request_sessions():
+    """Roll back all sessions used in this context"""
+    for session in request_sessions():
+        session.rollback()
+
+def run_write(work, user_id):
+    """
+    Run a unit of write work on the user's shard and make it durable
+
+    With GROUP_COMMIT_ENABLED the work is handed to the group committer and
+    applied on its session together with other requests' writes; otherwise it
+    runs on the request session followed by commit_session(). Either way the
+    call returns only once the write is committed (or deferred to an atomic
+    batch).
+
+    Args:
+        work (callable): Function taking a session and returning a plain result,
+            e.g. a task dictionary. It must not touch request state.
+        user_id (int): Owner of the tasks being written; selects the shard
+
+    Returns:
+        The value returned by work
+    """
+    router = current_app.extensions['shard_router']
+    shard = router.shard_for(user_id)
+
+    committer = current_app.extensions.get('group_commit')
+    if committer is not None and not g.get('defer_commit'):
+        return committer.submit(work, shard)
+
+    session = router.session(shard)
+    result = work(session)
+    commit_session(session)
+    return result
@@ -0,0 +1,11 @@
+"""
+Smart Task Manager - WSGI entry point
+Used by gunicorn (see gunicorn.conf.py)
+"""
+
+import os
+from app import create_app
+
+# Serving entry points default to production; set FLASK_ENV=development to
+# get DEBUG and AUTO_CREATE_TABLES under gunicorn.
+app = create_app(os.environ.get('FLASK_ENV') or 'production')